@@ -6,4 +6,11 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
-        import api.models  # import the signals
\ No newline at end of file
+        import api.models  # import the signals
+        import api.cache  # response cache invalidation signals
+        import api.search  # search index maintenance signals
+        import api.events  # activity stream signals
+        import api.changelog  # sync change log signals
+        import api.counters  # project activity counter signals
+        import api.authentication  # token cache invalidation signals
+        import api.timing  # query timing on new connections
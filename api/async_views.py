@@ -0,0 +1,258 @@
+"""
+Native async read path for when the API is served over ASGI. Opt-in with
+``ASYNC_API_VIEWS``: it has yet to beat the sync views measurably.
+
+``GET`` list and detail requests for projects, comments and links, and the
+dashboard summary, no longer hold a worker thread for the whole request.
+Authentication, permissions, filter validation, the response cache lookup
+and the conditional-GET validators run in one ``sync_to_async`` hop, through
+the same mixins as the DRF views; the page rows, count and detail object
+are then fetched with the async ORM. The dashboard figures are independent
+of each other and run concurrently, each on its own connection when
+``ASYNC_PARALLEL_QUERIES`` is on. Anything else (other methods, cursor
+pagination, ``?page=last``, the browsable API) is handed to the DRF view
+unchanged.
+"""
+import asyncio
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import URLPattern
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import timing
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .pagination import DashboardPagination
+
+# Router URL names served by the async views
+ASYNC_ROUTES = (
+    'project-list', 'project-detail',
+    'comment-list', 'comment-detail',
+    'projectlink-list', 'projectlink-detail',
+)
+
+
+def closing_connections(func):
+    """Return the worker thread's connection once ``func`` is done, as a request would."""
+    def run():
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def run_queries(queries):
+    """
+    Run a dict of independent blocking ORM calls and return their results
+    by name. With ``ASYNC_PARALLEL_QUERIES`` each call gets its own thread
+    and connection; otherwise they run one by one on the request's connection.
+    """
+    if getattr(settings, 'ASYNC_PARALLEL_QUERIES', False) and len(queries) > 1:
+        calls = [sync_to_async(closing_connections(query), thread_sensitive=False)() for query in queries.values()]
+        return dict(zip(queries, await asyncio.gather(*calls)))
+    return {name: await sync_to_async(query)() for name, query in queries.items()}
+
+
+class AsyncRead:
+    """
+    Serves one GET for a DRF view class without dispatching it: the view
+    instance provides authentication, querysets, serializers, pagination,
+    caching and exception handling.
+    """
+
+    def __init__(self, callback, request, args, kwargs):
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.view = view = callback.cls(**callback.initkwargs)
+        actions = getattr(callback, 'actions', None)
+        if actions:
+            view.action_map = actions
+            view.action = actions.get('get')
+        view.args = args
+        view.kwargs = kwargs
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        self.cache_key = None
+        self.validators = None
+
+    @property
+    def request(self):
+        return self.view.request
+
+    def can_serve(self):
+        return isinstance(self.request.accepted_renderer, JSONRenderer)
+
+    async def respond(self):
+        try:
+            prepared = await sync_to_async(self.prepare)()
+            if prepared is None:
+                return await sync_to_async(rendered(self.callback))(self.request._request, *self.args, **self.kwargs)
+            response = await self.build(prepared)
+        except Exception as exc:
+            response = self.view.handle_exception(exc)
+        return self.finalize(response)
+
+    def prepare(self):
+        """Everything that may query before the payload, in one thread hop."""
+        self.view.initial(self.request, *self.args, **self.kwargs)
+        if not self.can_serve():
+            return None
+        return True
+
+    async def build(self, prepared):
+        raise NotImplementedError
+
+    def finalize(self, response):
+        """Render here so the handler does not hop to a thread to do it."""
+        response = self.view.finalize_response(self.request, response, *self.args, **self.kwargs)
+        with timing.render_span():
+            content = response.rendered_content
+        rendered = HttpResponse(content, status=response.status_code)
+        for name, value in response.items():
+            rendered[name] = value
+        for cookie in response.cookies.values():
+            rendered.cookies[cookie.key] = cookie
+        return rendered
+
+
+class AsyncViewSetRead(AsyncRead):
+    """
+    ``list`` or ``retrieve`` of a ModelViewSet route, through the view's own
+    CachedResponseMixin, ConditionalGetMixin and paginator helpers; only the
+    rows, count and object are fetched here, with the async ORM.
+    """
+
+    def can_serve(self):
+        if not super().can_serve():
+            return False
+        paginator = self.view.paginator
+        if self.view.action == 'list' and paginator is not None:
+            if not isinstance(paginator, DashboardPagination) or paginator.wants_cursor(self.request, self.view):
+                return False
+            if self.request.query_params.get(paginator.page_class.page_query_param) == 'last':
+                return False
+        return True
+
+    @property
+    def detail(self):
+        return self.view.action == 'retrieve'
+
+    def prepare(self):
+        if not super().prepare():
+            return None
+        view = self.view
+        queryset = view.filter_queryset(view.get_queryset())
+        cached = None
+        if isinstance(view, CachedResponseMixin):
+            self.cache_key = view.get_cache_key(self.request)
+            cached = cache.get(self.cache_key)
+        if isinstance(view, ConditionalGetMixin):
+            self.validators = view.get_validators(self.request, self.detail, queryset)
+        return queryset, cached
+
+    async def build(self, prepared):
+        queryset, cached = prepared
+        view = self.view
+        if self.validators is not None:
+            not_modified = view.not_modified(self.request, self.validators)
+            if not_modified is not None:
+                # A DRF response, so finalize() can render it
+                return self.with_validators(Response(status=not_modified.status_code))
+        if cached is not None:
+            return self.with_validators(view.cache_hit(cached))
+        response = await (self.retrieve(queryset) if self.detail else self.list(queryset))
+        if self.cache_key is not None:
+            response = await sync_to_async(view.cache_miss)(self.cache_key, response)
+        return self.with_validators(response)
+
+    def with_validators(self, response):
+        if self.validators is None:
+            return response
+        return self.view.add_validators(response, self.validators)
+
+    async def list(self, queryset):
+        view = self.view
+        page = None
+        if view.paginator is not None:
+            page = view.paginator.delegate = view.paginator.page_class()
+            with_count = page.wants_count(self.request)
+            bounds = page.page_bounds(self.request, with_count)
+        if page is None or bounds is None:
+            rows = [row async for row in queryset]
+            return Response(view.get_serializer(rows, many=True).data)
+
+        page_number, page_size, start, stop = bounds
+        rows = [row async for row in queryset[start:stop]]
+        count = await queryset.acount() if with_count else None
+        rows = page.paginate_rows(self.request, rows, page_number, page_size, count)
+        return page.get_paginated_response(view.get_serializer(rows, many=True).data)
+
+    async def retrieve(self, queryset):
+        view = self.view
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            obj = await aget_object_or_404(queryset, **{view.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            # A malformed lookup value is a 404 too, as in DRF's get_object_or_404
+            raise Http404
+        await sync_to_async(view.check_object_permissions)(self.request, obj)
+        return Response(view.get_serializer(obj).data)
+
+
+class AsyncSummaryRead(AsyncRead):
+    """A view whose ``summary_queries()`` figures are independent of each other."""
+
+    def prepare(self):
+        if not super().prepare():
+            return None
+        return self.view.get_projects(self.request)
+
+    async def build(self, projects):
+        return Response(await run_queries(self.view.summary_queries(projects)))
+
+
+def rendered(callback):
+    """Also render in the worker thread: the browsable API queries while rendering."""
+    def view(request, *args, **kwargs):
+        response = callback(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            with timing.render_span():
+                response.render()
+        return response
+    return view
+
+
+def async_view(callback, read_class=AsyncViewSetRead):
+    """
+    Wrap a DRF view function: GET is served natively by ``read_class``,
+    every other method goes to ``callback`` in a worker thread.
+    """
+    sync_callback = sync_to_async(rendered(callback))
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET':
+            return await sync_callback(request, *args, **kwargs)
+        return await read_class(callback, request, args, kwargs).respond()
+
+    update_wrapper(view, callback)
+    return view
+
+
+def async_patterns(patterns):
+    """Copies of the router's patterns with the async views swapped in for ``ASYNC_ROUTES``."""
+    swapped = []
+    for pattern in patterns:
+        if getattr(pattern, 'name', None) in ASYNC_ROUTES:
+            pattern = URLPattern(pattern.pattern, async_view(pattern.callback), pattern.default_args, pattern.name)
+        swapped.append(pattern)
+    return swapped
@@ -0,0 +1,93 @@
+"""
+Token authentication with the token lookup cached.
+
+DRF's TokenAuthentication joins the token to its user on every request.
+CachedTokenAuthentication keeps that row in the cache for
+``AUTH_TOKEN_CACHE_TIMEOUT`` seconds. Deleting a token (revoking it) and
+saving or deleting its user drop the cached entry, so a revoked token or a
+deactivated user is refused on the next request. With a per-process cache
+other processes notice only when their entry expires; use a shared cache
+(CACHE_BACKEND) when revocation must take effect everywhere at once.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+TOKEN_KEY = 'api:token:{}'
+# The key of a user's token, so user changes can drop its entry without a query
+USER_TOKEN_KEY = 'api:user-token:{}'
+
+
+def token_queryset():
+    # The password hash is never needed to serve a request; keep it out of the cache
+    return Token.objects.select_related('user').defer('user__password')
+
+
+def cache_token(token):
+    timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+    cache.set_many({TOKEN_KEY.format(token.key): token, USER_TOKEN_KEY.format(token.user_id): token.key}, timeout)
+
+
+def forget_user_token(user_id):
+    key = cache.get(USER_TOKEN_KEY.format(user_id))
+    if key is not None:
+        cache.delete_many([TOKEN_KEY.format(key), USER_TOKEN_KEY.format(user_id)])
+
+
+def get_token(user):
+    """
+    The key of the user's token, created on first login. Always read from
+    the database: a cached key may belong to a token revoked in another
+    process, and handing it out would make the login useless.
+    """
+    token, _ = Token.objects.get_or_create(user=user)
+    return token.key
+
+
+def authenticate(request):
+    """
+    The user DEFAULT_AUTHENTICATION_CLASSES accept for a plain Django
+    request (one that is not going through an APIView), or AnonymousUser.
+    Raises AuthenticationFailed for a bad token, as the API views do.
+    """
+    authenticators = [authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    return Request(request, authenticators=authenticators).user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        token = cache.get(TOKEN_KEY.format(key))
+        if token is None:
+            try:
+                token = token_queryset().get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache_token(token)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return (token.user, token)
+
+
+# Invalidation
+
+@receiver(post_delete, sender=Token)
+def forget_revoked_token(sender, instance, **kwargs):
+    cache.delete_many([TOKEN_KEY.format(instance.key), USER_TOKEN_KEY.format(instance.user_id)])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user_token(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which authentication does not read
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    forget_user_token(instance.pk)
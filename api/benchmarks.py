@@ -0,0 +1,21 @@
+"""
+Shared helpers for the benchmark commands (benchmark_api, benchmark_auth,
+benchmark_database, load_test).
+"""
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def latency_summary(latencies):
+    """Milliseconds at the usual percentiles for a list of durations in seconds."""
+    latencies = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
@@ -0,0 +1,182 @@
+"""
+Batched writes behind the project bulk endpoints.
+
+Related ids for a whole batch are resolved with one query per model and rows
+are written with ``bulk_create`` / ``bulk_update`` and direct through-table
+inserts. Those skip model signals, so each writer bumps the response cache
+version, updates the search index, publishes activity events, appends to
+the sync change log and keeps the project counters itself.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import changelog
+from .cache import bump_version
+from .counters import count_of
+from .events import publish_resource_changes, publish_status_changes
+from .models import Client, Project, Resource
+from .search import get_backend
+
+MAX_BULK_ITEMS = 1000
+BATCH_SIZE = 500
+
+ProjectResource = Project.resources.through
+
+
+def check_batch(data):
+    if not isinstance(data, list):
+        raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+    if not data:
+        raise ValidationError({'non_field_errors': ['This list may not be empty.']})
+    if len(data) > MAX_BULK_ITEMS:
+        raise ValidationError({'non_field_errors': [f'At most {MAX_BULK_ITEMS} items per request.']})
+
+
+def existing_ids(queryset, ids):
+    if not ids:
+        return set()
+    return set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def missing_pk_error(pk):
+    return [f'Invalid pk "{pk}" - object does not exist.']
+
+
+def create_projects(items):
+    """
+    Create projects from ``(index, validated_data)`` pairs.
+
+    Returns one result per item: ``{'index', 'id'}`` when created or
+    ``{'index', 'errors'}`` when a related id does not resolve.
+    """
+    clients = existing_ids(Client.objects.all(), {data['client'] for _, data in items})
+    admins = existing_ids(
+        User.objects.filter(profile__role='ADMIN'),
+        {data['assigned_resource'] for _, data in items if data.get('assigned_resource')},
+    )
+    resources = existing_ids(
+        Resource.objects.filter(is_active=True),
+        {pk for _, data in items for pk in data.get('resources', [])},
+    )
+
+    results = []
+    pending = []
+    for index, data in items:
+        data = dict(data)
+        resource_ids = data.pop('resources', [])
+        errors = {}
+        if data['client'] not in clients:
+            errors['client'] = missing_pk_error(data['client'])
+        if data.get('assigned_resource') and data['assigned_resource'] not in admins:
+            errors['assigned_resource'] = missing_pk_error(data['assigned_resource'])
+        unknown = [pk for pk in resource_ids if pk not in resources]
+        if unknown:
+            errors['resources'] = missing_pk_error(unknown[0])
+        if errors:
+            results.append({'index': index, 'errors': errors})
+            continue
+
+        data['client_id'] = data.pop('client')
+        data['assigned_resource_id'] = data.pop('assigned_resource', None)
+        resource_ids = list(dict.fromkeys(resource_ids))
+        pending.append((index, Project(**data, resource_count=len(resource_ids)), resource_ids))
+
+    if pending:
+        with transaction.atomic():
+            Project.objects.bulk_create([project for _, project, _ in pending], batch_size=BATCH_SIZE)
+            ProjectResource.objects.bulk_create(
+                [
+                    ProjectResource(project_id=project.pk, resource_id=pk)
+                    for _, project, resource_ids in pending
+                    for pk in resource_ids
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            get_backend().index_projects([project for _, project, _ in pending])
+            changelog.record('project', [project.pk for _, project, _ in pending])
+        bump_version('project')
+
+    results += [{'index': index, 'id': project.pk} for index, project, _ in pending]
+    return sorted(results, key=lambda result: result['index'])
+
+
+def update_statuses(items):
+    """
+    Apply ``{'id', 'status'}`` changes with a single ``bulk_update``.
+    """
+    projects = Project.objects.only('id', 'status', 'client_id').in_bulk([item['id'] for item in items])
+    previous = {pk: project.status for pk, project in projects.items()}
+    now = timezone.now()
+    results = []
+    changed = {}
+    for index, item in enumerate(items):
+        project = projects.get(item['id'])
+        if project is None:
+            results.append({'index': index, 'errors': {'id': missing_pk_error(item['id'])}})
+            continue
+        project.status = item['status']
+        # bulk_update() does not fire auto_now
+        project.updated_at = now
+        changed[project.pk] = project
+        results.append({'index': index, 'id': project.pk})
+
+    if changed:
+        with transaction.atomic():
+            Project.objects.bulk_update(list(changed.values()), ['status', 'updated_at'], batch_size=BATCH_SIZE)
+            publish_status_changes(changed.values(), previous)
+            changelog.record('project', changed)
+        bump_version('project')
+    return results
+
+
+def change_resources(action, project_ids, resource_ids):
+    """
+    Assign or unassign every resource to every project with one
+    through-table insert or delete. Returns the number of rows changed.
+    """
+    projects = existing_ids(Project.objects.all(), set(project_ids))
+    resources = existing_ids(
+        Resource.objects.filter(is_active=True) if action == 'assign' else Resource.objects.all(),
+        set(resource_ids),
+    )
+    errors = {}
+    unknown = [pk for pk in project_ids if pk not in projects]
+    if unknown:
+        errors['projects'] = missing_pk_error(unknown[0])
+    unknown = [pk for pk in resource_ids if pk not in resources]
+    if unknown:
+        errors['resources'] = missing_pk_error(unknown[0])
+    if errors:
+        raise ValidationError(errors)
+
+    with transaction.atomic():
+        if action == 'assign':
+            existing = set(
+                ProjectResource.objects.filter(project_id__in=projects, resource_id__in=resources)
+                .values_list('project_id', 'resource_id')
+            )
+            rows = [
+                ProjectResource(project_id=project_id, resource_id=resource_id)
+                for project_id in projects
+                for resource_id in resources
+                if (project_id, resource_id) not in existing
+            ]
+            ProjectResource.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+            changed = len(rows)
+        else:
+            changed, _ = ProjectResource.objects.filter(
+                project_id__in=projects, resource_id__in=resources
+            ).delete()
+        if changed:
+            Project.objects.filter(pk__in=projects).update(
+                updated_at=timezone.now(), resource_count=count_of(ProjectResource),
+            )
+            changelog.record('project', projects)
+            publish_resource_changes(
+                Project.objects.filter(pk__in=projects).values_list('pk', 'client_id'), action, resources,
+            )
+    if changed:
+        bump_version('project')
+    return changed
@@ -0,0 +1,152 @@
+"""
+Versioned response cache for the read-heavy ViewSets.
+
+Every cached response key embeds the current version counter of each model
+the payload depends on. Signals bump the counters on writes, so stale entries
+are never read again and simply expire.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Client, Project, Comment, ProjectLink, Resource
+from .routers import reads_from_replica, replica_aliases
+
+VERSION_KEY = 'api:version:{}'
+VERSION_TIME_KEY = 'api:version-time:{}'
+RESPONSE_KEY = 'api:response:{}:{}'
+LAST_WRITE_KEY = 'api:last-write'
+
+
+def get_versions(names):
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def get_changed_at(names):
+    """
+    Unix time of the latest bump of any of the counters. A counter whose
+    time is unknown (never bumped, restarted or evicted cache) is taken to
+    have changed now, so the result is never earlier than a real change.
+    """
+    keys = [VERSION_TIME_KEY.format(name) for name in names]
+    times = cache.get_many(keys)
+    for key in keys:
+        if key not in times:
+            cache.add(key, time.time(), timeout=None)
+            times[key] = cache.get(key, time.time())
+    return max(times.values(), default=None)
+
+
+def bump_version(*names):
+    for name in names:
+        key = VERSION_KEY.format(name)
+        # add() is a no-op when the counter exists; incr() is atomic on shared caches
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+        cache.set(VERSION_TIME_KEY.format(name), time.time(), timeout=None)
+    if replica_aliases():
+        cache.set(LAST_WRITE_KEY, time.time(), timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def replica_may_lag():
+    """
+    True when this request reads from a replica that may not have caught up
+    with the latest write yet. Such responses must not be cached under the
+    new version, or the stale payload would outlive the replication lag.
+    """
+    return reads_from_replica() and cache.get(LAST_WRITE_KEY) is not None
+
+
+class CachedResponseMixin:
+    """
+    Caches ``list`` and ``retrieve`` responses for a ViewSet.
+
+    ``cache_dependencies`` names the version counters the payload depends on.
+    """
+    cache_dependencies = ()
+
+    def get_cache_key(self, request):
+        user = request.user
+        scope = user.pk if user and user.is_authenticated else 'anon'
+        params = sorted(request.query_params.lists())
+        versions = get_versions(self.cache_dependencies)
+        # Host is part of the key because paginated payloads carry absolute links
+        raw = f"{request.get_host()}{request.path}|{params}|{scope}|{versions}"
+        return RESPONSE_KEY.format(self.basename, hashlib.sha256(raw.encode()).hexdigest())
+
+    def cached_response(self, request, action, *args, **kwargs):
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return self.cache_hit(data)
+        return self.cache_miss(key, action(request, *args, **kwargs))
+
+    def cache_hit(self, data):
+        response = Response(data)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def cache_miss(self, key, response):
+        """Store a freshly built response under ``key`` and mark it as a miss."""
+        if response.status_code == status.HTTP_200_OK and not replica_may_lag():
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, super().retrieve, *args, **kwargs)
+
+
+# Version counters, bumped on every write that can change a cached payload
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_client_version(sender, **kwargs):
+    bump_version('client')
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+def bump_resource_version(sender, **kwargs):
+    bump_version('resource')
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=ProjectLink)
+@receiver(post_delete, sender=ProjectLink)
+def bump_project_version(sender, **kwargs):
+    # Comments and links are embedded in the project detail
+    bump_version('project')
+
+
+@receiver(m2m_changed, sender=Project.resources.through)
+def bump_project_resources_version(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version('project')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no payload exposes
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('user')
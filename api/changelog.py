@@ -0,0 +1,147 @@
+"""
+Change log behind incremental sync (``/api/sync/``).
+
+Every create, update or delete of a project, comment, link, resource or
+client appends a ChangeLogEntry from the model signals, in the same
+transaction as the write. A client keeps the id of the last entry it has
+applied as its token and asks for the entries after it.
+
+Ids are handed out when a transaction inserts, not when it commits, so an
+entry may become visible after a later one. Only entries older than
+``SYNC_SETTLE_SECONDS`` are served; any transaction shorter than that has
+committed by then, so no entry appears behind a token already handed out.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .counters import affected_projects, assigned_projects, deleted_with_project
+from .models import ChangeLogEntry, Client, Comment, Project, ProjectLink, Resource
+
+SYNC_KINDS = {
+    Project: 'project',
+    Comment: 'comment',
+    ProjectLink: 'link',
+    Resource: 'resource',
+    Client: 'client',
+}
+
+BATCH_SIZE = 500
+
+
+def record(kind, ids, deleted=False, projects=()):
+    """
+    Log a change to each of ``ids``, plus to ``projects`` whose rows it
+    changed, in one insert. Bulk writers, which bypass the signals, call
+    this directly.
+    """
+    entries = [ChangeLogEntry(kind=kind, object_id=pk, deleted=deleted) for pk in ids]
+    entries += [ChangeLogEntry(kind='project', object_id=pk) for pk in projects]
+    if entries:
+        ChangeLogEntry.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+
+def settled():
+    """Entries old enough that every earlier id has committed."""
+    cutoff = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    return ChangeLogEntry.objects.filter(created_at__lte=cutoff)
+
+
+def current_token():
+    """The token to take before a full load: later entries are the changes it missed."""
+    latest = settled().order_by('-id').values_list('id', flat=True).first()
+    if latest is not None:
+        return latest
+    oldest = ChangeLogEntry.objects.order_by('id').values_list('id', flat=True).first()
+    return oldest - 1 if oldest is not None else 0
+
+
+def expired(token):
+    """True when entries after ``token`` have been pruned, so the client must reload."""
+    oldest = ChangeLogEntry.objects.order_by('id').values_list('id', flat=True).first()
+    return oldest is not None and token + 1 < oldest
+
+
+def changes_since(token, limit):
+    """
+    Return ``(changed, deleted, token, more)`` for at most ``limit`` entries
+    after ``token``: ``changed`` and ``deleted`` map each kind to ids, by
+    the last entry for each object, and ``more`` is True when entries remain.
+    """
+    entries = list(
+        settled().filter(id__gt=token).order_by('id').values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+    latest = {}
+    for _, kind, object_id, deleted in entries:
+        latest[kind, object_id] = deleted
+    changed = {kind: [] for kind in SYNC_KINDS.values()}
+    removed = {kind: [] for kind in SYNC_KINDS.values()}
+    for (kind, object_id), deleted in latest.items():
+        (removed if deleted else changed)[kind].append(object_id)
+    return changed, removed, entries[-1][0] if entries else token, more
+
+
+def prune(older_than):
+    """
+    Delete entries created before ``older_than``, always keeping the newest
+    one so ``expired()`` can tell which tokens are still served.
+    """
+    newest = ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first()
+    if newest is None:
+        return 0
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=older_than, id__lt=newest).delete()
+    return deleted
+
+
+# Signals
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=ProjectLink)
+@receiver(post_save, sender=Resource)
+@receiver(post_save, sender=Client)
+def record_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Project rows carry the comment and link counters
+    projects = affected_projects(instance, created) if sender in (Comment, ProjectLink) else ()
+    record(SYNC_KINDS[sender], [instance.pk], projects=projects)
+    if created:
+        return
+    # Project rows carry the client's and the resources' names
+    if sender is Client and not (update_fields and 'company_name' not in update_fields):
+        record('project', instance.projects.values_list('pk', flat=True))
+    elif sender is Resource:
+        record('project', instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ProjectLink)
+@receiver(post_delete, sender=Resource)
+@receiver(post_delete, sender=Client)
+def record_delete(sender, instance, origin=None, **kwargs):
+    projects = ()
+    if sender in (Comment, ProjectLink) and not deleted_with_project(origin):
+        projects = [instance.project_id]
+    elif sender is Resource:
+        # Its assignments went by cascade, without m2m_changed
+        projects = assigned_projects(instance)
+    record(SYNC_KINDS[sender], [instance.pk], deleted=True, projects=projects)
+
+
+@receiver(m2m_changed, sender=Project.resources.through)
+def record_project_resources(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear') and (pk_set or action == 'post_clear'):
+            record('project', [instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        record('project', pk_set or ())
+    elif action == 'pre_clear':
+        # resource.projects.clear(): the projects are only known beforehand
+        record('project', instance.projects.values_list('pk', flat=True))
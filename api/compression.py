@@ -0,0 +1,72 @@
+"""
+Response compression, negotiated from ``Accept-Encoding``.
+
+Brotli is used when the ``brotli`` package is installed and the client
+accepts it, gzip otherwise. CompressionMiddleware only compresses bodies
+of at least ``COMPRESSION_MIN_BYTES`` with a text-like content type;
+streaming responses (the export and the activity stream) go out as they are.
+"""
+import gzip
+import re
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(json|javascript|xml|.*\+json|.*\+xml))')
+
+
+def available_encodings():
+    """Encodings this process can produce, preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    """``{coding: q}`` from an Accept-Encoding header; ``*`` stands for the rest."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """The best encoding both sides support, or None for identity."""
+    accepted = parse_accept_encoding(header or '')
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        # Ties go to the server's preference (the first one found)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output, and so any ETag derived from it, stable
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def is_compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and bool(COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')))
+        and len(response.content) >= settings.COMPRESSION_MIN_BYTES
+    )
@@ -0,0 +1,107 @@
+"""
+Conditional GET support for the ViewSets.
+
+Validators come from one aggregate query (MAX(updated_at) and row count, plus
+child counts and MAX(created_at) on detail), so an unchanged poll gets a
+``304 Not Modified`` without the payload being loaded or serialized.
+
+``Last-Modified`` must move whenever the ETag does, and the row timestamps
+alone miss deletions and edits to related rows. So it is the latest of the
+row timestamps and the times the response cache version counters were last
+bumped (every such write bumps one), and it is left out until a whole
+second has passed since then: a later change within the same second would
+otherwise carry the same HTTP date.
+"""
+import hashlib
+import math
+import time
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_changed_at, get_versions
+
+
+class ConditionalGetMixin:
+    """
+    Adds ``ETag`` and ``Last-Modified`` to ``list`` and ``retrieve`` and
+    answers matching ``If-None-Match`` / ``If-Modified-Since`` with a 304.
+
+    ``etag_children`` names reverse relations whose rows (with ``created_at``)
+    are embedded in the detail payload; ``etag_fields`` names columns that
+    already summarize them, such as denormalized counters, read instead.
+    The response cache version counters are folded into the tag so edits to
+    related rows also change it.
+    """
+    etag_children = ()
+    etag_fields = ()
+    weak_etags = True
+
+    def get_list_validators(self, queryset):
+        return queryset.order_by().aggregate(updated_at=Max('updated_at'), count=Count('pk'))
+
+    def get_detail_validators(self, queryset):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        annotations = {}
+        for name in self.etag_children:
+            relation = queryset.model._meta.get_field(name)
+            fk_name = relation.field.name
+            children = relation.related_model.objects.filter(**{fk_name: OuterRef('pk')}).order_by().values(fk_name)
+            annotations[f'{name}_count'] = Subquery(children.annotate(n=Count('pk')).values('n'))
+            annotations[f'{name}_created_at'] = Subquery(children.annotate(latest=Max('created_at')).values('latest'))
+        return queryset.annotate(**annotations).values('pk', 'updated_at', *self.etag_fields, *annotations).first()
+
+    def get_validators(self, request, detail, queryset=None):
+        if queryset is None:
+            queryset = self.filter_queryset(self.get_queryset())
+        values = self.get_detail_validators(queryset) if detail else self.get_list_validators(queryset)
+        if not values:
+            return None, None
+
+        versions = get_versions(getattr(self, 'cache_dependencies', ()))
+        raw = f"{request.get_full_path()}|{sorted(values.items())}|{versions}"
+        etag = '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+        if self.weak_etags:
+            etag = f'W/{etag}'
+
+        return etag, self.get_last_modified(values)
+
+    def get_last_modified(self, values):
+        dependencies = getattr(self, 'cache_dependencies', ())
+        if not dependencies:
+            # Nothing records deletions; only the ETag is sound
+            return None
+        timestamps = [value.timestamp() for key, value in values.items() if key.endswith('_at') and value]
+        timestamps.append(get_changed_at(dependencies))
+        last_modified = math.floor(max(timestamps))
+        if time.time() < last_modified + 1:
+            return None
+        return last_modified
+
+    def conditional_response(self, request, action, detail, *args, **kwargs):
+        validators = self.get_validators(request, detail)
+        response = self.not_modified(request, validators)
+        if response is None:
+            response = action(request, *args, **kwargs)
+        return self.add_validators(response, validators)
+
+    def not_modified(self, request, validators):
+        """The 304 (or 412) for ``get_validators()``, or None to build the payload."""
+        etag, last_modified = validators
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def add_validators(self, response, validators):
+        etag, last_modified = validators
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, False, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, True, *args, **kwargs)
@@ -0,0 +1,168 @@
+"""
+Denormalized activity counters on Project.
+
+``comment_count``, ``link_count``, ``resource_count`` and
+``last_activity_at`` (the newest comment or link) are kept current from
+the model signals with single-row ``F()`` updates, so the list can show and
+sort by them without counting the comment and link tables. Adding a
+resource is counted with ``F()`` too; removals recount the project's
+assignments instead, as ``remove()`` reports the ids it was given, not the
+ones that were assigned. Deleting a resource removes its assignments by
+cascade, which sends no ``m2m_changed``; its projects are noted before the
+delete and recounted after. Bulk writers bypass the signals and maintain
+the counters themselves; ``recompute_project_counters`` repairs any drift.
+"""
+from django.db.models import Count, DateTimeField, F, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Comment, Project, ProjectLink, Resource
+
+ProjectResource = Project.resources.through
+
+# Which counter each child model feeds
+COUNTS = {Comment: 'comment_count', ProjectLink: 'link_count'}
+
+
+def count_of(model):
+    rows = model.objects.filter(project_id=OuterRef('pk')).order_by().values('project_id')
+    return Coalesce(Subquery(rows.annotate(total=Count('pk')).values('total')), Value(0))
+
+
+def newest(model):
+    return Subquery(
+        model.objects.filter(project_id=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def latest_activity():
+    # Greatest() is NULL on SQLite when either side is; Coalesce each way round
+    comment, link = newest(Comment), newest(ProjectLink)
+    return Greatest(Coalesce(comment, link), Coalesce(link, comment), output_field=DateTimeField())
+
+
+def expected_counters():
+    """Expressions for each counter's true value, for ``update()`` or ``annotate()``."""
+    return {
+        'comment_count': count_of(Comment),
+        'link_count': count_of(ProjectLink),
+        'resource_count': count_of(ProjectResource),
+        'last_activity_at': latest_activity(),
+    }
+
+
+def recount(project_ids, *fields):
+    """Set ``fields`` (all counters by default) of the projects to their true values."""
+    expected = expected_counters()
+    return Project.objects.filter(pk__in=project_ids).update(
+        **{field: expected[field] for field in fields or Project.COUNTER_FIELDS}
+    )
+
+
+def drifted(queryset):
+    """Ids of the projects in ``queryset`` whose stored counters are off."""
+    expected = {f'expected_{field}': value for field, value in expected_counters().items()}
+    rows = queryset.annotate(**expected).values_list('pk', *Project.COUNTER_FIELDS, *expected)
+    width = len(Project.COUNTER_FIELDS)
+    return [row[0] for row in rows if row[1:width + 1] != row[width + 1:]]
+
+
+def affected_projects(instance, created):
+    """Projects whose counters a saved comment or link changed."""
+    if created:
+        return [instance.project_id]
+    previous = instance.moved_from()
+    return [instance.project_id, previous] if previous is not None else []
+
+
+def deleted_with_project(origin):
+    """
+    True when a comment or link goes because its project (or client) was
+    deleted; the project row is going too, so it is not worth updating.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model not in COUNTS
+
+
+def assigned_projects(resource):
+    """Projects a deleted resource was assigned to, as noted before the delete."""
+    return getattr(resource, '_assigned_project_ids', [])
+
+
+def add_activity(project_id, field, created_at):
+    Project.objects.filter(pk=project_id).update(**{
+        field: F(field) + 1,
+        'last_activity_at': Greatest(Coalesce('last_activity_at', Value(created_at)), Value(created_at)),
+    })
+
+
+def decrement(field):
+    # Never below zero, the columns' CHECK constraint: rows the signals never
+    # counted (loaddata, raw SQL) can still be deleted or unassigned
+    return Greatest(F(field) - 1, Value(0))
+
+
+def remove_activity(project_id, field):
+    Project.objects.filter(pk=project_id).update(**{field: decrement(field), 'last_activity_at': latest_activity()})
+
+
+# Signals
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=ProjectLink)
+def count_saved_child(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    field = COUNTS[sender]
+    if created:
+        add_activity(instance.project_id, field, instance.created_at)
+        return
+    previous = instance.moved_from()
+    if previous is not None:
+        add_activity(instance.project_id, field, instance.created_at)
+        remove_activity(previous, field)
+
+
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=ProjectLink)
+def count_deleted_child(sender, instance, origin=None, **kwargs):
+    if deleted_with_project(origin):
+        return
+    remove_activity(instance.project_id, COUNTS[sender])
+
+
+@receiver(m2m_changed, sender=ProjectResource)
+def count_project_resources(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action == 'post_add' and pk_set:
+            # Django leaves out the ids that were already assigned
+            Project.objects.filter(pk=instance.pk).update(resource_count=F('resource_count') + len(pk_set))
+        elif action == 'post_remove' and pk_set:
+            recount([instance.pk], 'resource_count')
+        elif action == 'post_clear':
+            Project.objects.filter(pk=instance.pk).update(resource_count=0)
+    elif action == 'post_add' and pk_set:
+        Project.objects.filter(pk__in=pk_set).update(resource_count=F('resource_count') + 1)
+    elif action == 'post_remove' and pk_set:
+        recount(pk_set, 'resource_count')
+    elif action == 'pre_clear':
+        # resource.projects.clear(): the projects are only known beforehand
+        Project.objects.filter(pk__in=instance.projects.values('pk')).update(resource_count=decrement('resource_count'))
+
+
+@receiver(pre_delete, sender=Resource)
+def note_resource_projects(sender, instance, **kwargs):
+    # The through rows go by cascade, without m2m_changed
+    instance._assigned_project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Resource)
+def count_deleted_resource(sender, instance, **kwargs):
+    projects = assigned_projects(instance)
+    if projects:
+        recount(projects, 'resource_count')
+        bump_version('project')
@@ -0,0 +1,253 @@
+"""
+Project activity events for the push channel (``/api/events/``).
+
+Model signals turn writes into compact events (status changes, resource
+reassignments, new comments and links) tagged with the project's client.
+They are published on commit to a broker, ``EVENTS_BROKER``, which fans them
+out to subscribers in that client's scope and keeps a replay buffer so a
+reconnecting stream can resume after its ``Last-Event-ID``.
+
+The default InProcessBroker only sees writes made by its own process; run a
+single ASGI process for the stream or plug in a shared broker.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Project, Comment, ProjectLink
+
+# Queued for a subscriber that fell too far behind; its stream then ends
+OVERFLOW = object()
+
+
+class Event:
+    __slots__ = ('id', 'type', 'client', 'project', 'data', 'at')
+
+    def __init__(self, id, type, client, project, data, at):
+        self.id = id
+        self.type = type
+        self.client = client
+        self.project = project
+        self.data = data
+        self.at = at
+
+    def as_dict(self):
+        return {'id': self.id, 'type': self.type, 'client': self.client, 'project': self.project,
+                'at': self.at, **self.data}
+
+    def encode(self):
+        """Server-Sent Events frame."""
+        payload = json.dumps(self.as_dict(), cls=DjangoJSONEncoder, separators=(',', ':'))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """
+    One stream's bounded queue. Events are offered on the subscriber's event
+    loop; a full queue is not waited on (that would stall every other
+    subscriber and the writer), it ends the stream with ``OVERFLOW`` and the
+    client resumes from the replay buffer.
+    """
+
+    def __init__(self, scope, loop, max_queue):
+        self.scope = scope
+        self.loop = loop
+        self.max_queue = max_queue
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.scope is None or self.scope == event.client
+
+    def offer(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_queue:
+            self.overflowed = True
+            self.queue.put_nowait(OVERFLOW)
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broker:
+    """
+    Interface for event brokers. ``publish`` may be called from any thread;
+    ``subscribe`` / ``unsubscribe`` and ``Subscription.get`` run on the
+    subscriber's event loop.
+    """
+
+    def publish(self, type, client, project, data):
+        raise NotImplementedError
+
+    def subscribe(self, scope, last_event_id=None):
+        """
+        Return ``(subscription, missed, complete)``: ``missed`` are the
+        buffered events after ``last_event_id`` in scope, and ``complete`` is
+        False when some were already dropped from the buffer.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+
+    def __init__(self, buffer_size=None, max_queue=None):
+        self.buffer = deque(maxlen=buffer_size or settings.EVENTS_BUFFER_SIZE)
+        self.max_queue = max_queue or settings.EVENTS_QUEUE_SIZE
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        # Ids start from the boot time in microseconds, so ids from a restarted
+        # process are newer than any a client saw before the restart
+        self.next_id = time.time_ns() // 1000
+
+    def publish(self, type, client, project, data):
+        with self.lock:
+            event = Event(self.next_id, type, client, project, data, timezone.now())
+            self.next_id += 1
+            self.buffer.append(event)
+            subscriptions = [sub for sub in self.subscriptions if sub.wants(event)]
+        for sub in subscriptions:
+            sub.loop.call_soon_threadsafe(sub.offer, event)
+        return event
+
+    def subscribe(self, scope, last_event_id=None):
+        sub = Subscription(scope, asyncio.get_running_loop(), self.max_queue)
+        with self.lock:
+            self.subscriptions.add(sub)
+            buffered = list(self.buffer)
+            oldest = buffered[0].id if buffered else self.next_id
+            newest = self.next_id - 1
+        if last_event_id is None:
+            return sub, [], True
+        missed = [event for event in buffered if event.id > last_event_id and sub.wants(event)]
+        # Nothing is missing if the buffer reaches back to the client's last id
+        # and that id came from this process
+        complete = oldest - 1 <= last_event_id <= newest
+        return sub, missed, complete
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def publish(type, client, project, **data):
+    """Publish once the current transaction commits, so rolled back writes never show up."""
+    transaction.on_commit(partial(get_broker().publish, type, client, project, data))
+
+
+def publish_status_changes(projects, previous):
+    """For bulk writers, which bypass the signals: ``previous`` maps pk to the old status."""
+    for project in projects:
+        if previous[project.pk] != project.status:
+            publish('project.status', project.client_id, project.pk,
+                    status=project.status, previous=previous[project.pk])
+
+
+def publish_resource_changes(project_clients, action, resource_ids):
+    for project_id, client_id in project_clients:
+        publish('project.resources', client_id, project_id, action=action, resources=sorted(resource_ids))
+
+
+# Signals
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    changed = instance.changed_fields()
+    if 'status' in changed:
+        publish('project.status', instance.client_id, instance.pk,
+                status=instance.status, previous=instance._loaded_values['status'])
+    if 'assigned_resource_id' in changed:
+        publish('project.assigned', instance.client_id, instance.pk,
+                assigned_resource=instance.assigned_resource_id)
+
+
+@receiver(m2m_changed, sender=Project.resources.through)
+def project_resources_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    action = {'post_add': 'assign', 'post_remove': 'unassign', 'post_clear': 'clear'}[action]
+    pk_set = pk_set or set()
+    if reverse:
+        # resource.projects.add(...): one resource, many projects
+        projects = Project.objects.filter(pk__in=pk_set).values_list('pk', 'client_id')
+        publish_resource_changes(projects, action, {instance.pk})
+    elif pk_set or action == 'clear':
+        publish_resource_changes([(instance.pk, instance.client_id)], action, pk_set)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish('comment.created', project_client(instance), instance.project_id,
+                comment=instance.pk, user=instance.user_id, text=instance.text[:280])
+
+
+@receiver(post_save, sender=ProjectLink)
+def link_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish('link.created', project_client(instance), instance.project_id,
+                link=instance.pk, url=instance.url, description=instance.description)
+
+
+def project_client(child):
+    """Client of a comment's or link's project, without a query when the project is loaded."""
+    if type(child).project.is_cached(child):
+        return child.project.client_id
+    return Project.objects.filter(pk=child.project_id).values_list('client_id', flat=True).first()
+
+
+# Stream
+
+async def event_stream(subscription, missed, complete, heartbeat):
+    """
+    SSE frames for one connection: resumed events first, then live ones,
+    with a comment line every ``heartbeat`` seconds to keep proxies open.
+    """
+    broker = get_broker()
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        if not complete:
+            # The client missed events we no longer have; it must refetch
+            yield "event: reset\ndata: {}\n\n"
+        for event in missed:
+            yield event.encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is OVERFLOW:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,100 @@
+"""
+Streaming project export shared by the export endpoint and the
+``export_projects`` command.
+
+Rows are read with ``iterator(chunk_size=...)`` and written one line at a
+time, so memory stays flat regardless of how many projects are exported.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from .models import Project, Comment, Resource
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = [
+    'id', 'project_number', 'client_id', 'client_name', 'description', 'status',
+    'client_delivery_date', 'internal_due_date', 'resources',
+    'latest_comment', 'latest_comment_at', 'link_count', 'created_at', 'updated_at',
+]
+
+
+def export_queryset(queryset=None):
+    """
+    Annotate projects with everything the export needs: client name and
+    latest comment as subqueries, resource names as a per-chunk prefetch.
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+    latest_comment = Comment.objects.filter(project=OuterRef('pk')).order_by('-created_at', '-id')
+    return (
+        queryset.select_related('client')
+        .only(
+            'id', 'project_number', 'client', 'client__company_name', 'description', 'status',
+            'client_delivery_date', 'internal_due_date', 'link_count', 'created_at', 'updated_at',
+        )
+        .annotate(
+            latest_comment=Subquery(latest_comment.values('text')[:1]),
+            latest_comment_at=Subquery(latest_comment.values('created_at')[:1]),
+        )
+        .prefetch_related(Prefetch('resources', queryset=Resource.objects.only('id', 'first_name', 'last_name')))
+        .order_by('id')
+    )
+
+
+def export_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    for project in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'id': project.id,
+            'project_number': project.project_number,
+            'client_id': project.client_id,
+            'client_name': project.client.company_name,
+            'description': project.description,
+            'status': project.status,
+            'client_delivery_date': project.client_delivery_date,
+            'internal_due_date': project.internal_due_date,
+            'resources': [r.full_name for r in project.resources.all()],
+            'latest_comment': project.latest_comment,
+            'latest_comment_at': project.latest_comment_at,
+            'link_count': project.link_count,
+            'created_at': project.created_at,
+            'updated_at': project.updated_at,
+        }
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row['resources'] = '; '.join(row['resources'])
+        yield writer.writerow([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in (row[field] for field in EXPORT_FIELDS)
+        ])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_lines(export_format, queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    rows = export_rows(export_queryset(queryset), chunk_size=chunk_size)
+    if export_format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
@@ -0,0 +1,104 @@
+"""
+Sparse fieldsets (``?fields=``) and relation expansion (``?expand=``) for
+the project and client endpoints.
+
+``?fields=id,status,client_name`` keeps only those top-level fields.
+``?expand=client,resources`` picks the relations embedded as objects; the
+others collapse to their ids, or for embedded collections are left out.
+Each serializer's ``setup_eager_loading`` takes the same options, so
+relations the response does not show are never joined or prefetched.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def primary_key():
+    return serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def primary_keys():
+    return serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer side. ``expandable_fields`` maps each relation to a factory
+    for the field it collapses to (None leaves it out); ``expand_by_default``
+    says whether a request without ``?expand=`` gets them all embedded.
+    ``dependent_fields`` maps a field to the relation it only comes with.
+    """
+    expandable_fields = {}
+    expand_by_default = False
+    dependent_fields = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.resolve_expand(expand)
+        for name, collapsed in self.expandable_fields.items():
+            if name in expand:
+                continue
+            if collapsed is None:
+                self.fields.pop(name, None)
+            else:
+                self.fields[name] = collapsed()
+        for name, relation in self.dependent_fields.items():
+            if relation not in expand:
+                self.fields.pop(name, None)
+        if fields is not None:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+
+    @classmethod
+    def resolve_expand(cls, expand):
+        if expand is None:
+            return set(cls.expandable_fields) if cls.expand_by_default else set()
+        return set(expand)
+
+    @classmethod
+    def shows(cls, name, fields):
+        return fields is None or name in fields
+
+    @classmethod
+    def expands(cls, name, fields, expand):
+        """Whether relation ``name`` is in the response embedded as an object."""
+        return cls.shows(name, fields) and name in cls.resolve_expand(expand)
+
+
+class SparseFieldsViewMixin:
+    """
+    View side: parses ``?fields=`` and ``?expand=`` on ``list`` and
+    ``retrieve`` and passes them to the serializer and to
+    ``setup_eager_loading`` (see ``sparse_options``). Unknown names are a 400.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def sparse_options(self):
+        if getattr(self, 'action', None) not in self.sparse_actions:
+            return {}
+        options = getattr(self, '_sparse_options', None)
+        if options is None:
+            options = self._sparse_options = self.parse_sparse_options(self.get_serializer_class())
+        return options
+
+    def parse_sparse_options(self, serializer_class):
+        params = self.request.query_params
+        options = {}
+        for param, allowed in (('fields', serializer_class.Meta.fields), ('expand', serializer_class.expandable_fields)):
+            value = params.get(param)
+            if value is None:
+                continue
+            names = {name.strip() for name in value.split(',') if name.strip()}
+            if param == 'fields' and not names:
+                # ?fields= with nothing listed means no restriction
+                continue
+            unknown = sorted(names - set(allowed))
+            if unknown:
+                raise ValidationError({
+                    param: f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(allowed)}."
+                })
+            options[param] = names
+        return options
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **self.sparse_options(), **kwargs)
@@ -0,0 +1,161 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from api.benchmarks import latency_summary
+from api.models import Client, Comment, Project, ProjectLink, Resource
+
+# name, method, path; {client}, {project} and {resource} are replaced with real ids
+SCENARIOS = [
+    ('clients-list', 'get', '/api/clients/'),
+    ('clients-detail', 'get', '/api/clients/{client}/'),
+    ('projects-list', 'get', '/api/projects/'),
+    ('projects-by-status', 'get', '/api/projects/?status=ACTIVE'),
+    ('projects-detail', 'get', '/api/projects/{project}/'),
+    ('comments-list', 'get', '/api/comments/'),
+    ('comments-by-project', 'get', '/api/comments/?project={project}'),
+    ('links-list', 'get', '/api/links/'),
+    ('links-by-project', 'get', '/api/links/?project={project}'),
+    ('resources-list', 'get', '/api/resources/'),
+    ('resources-detail', 'get', '/api/resources/{resource}/'),
+    ('auth-login', 'post', '/api/auth/login/'),
+]
+
+# Logins hash a password on purpose; time fewer of them
+LOGIN_ITERATION_DIVISOR = 10
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks every API endpoint in-process against the configured database (see seed_scale) '
+        'and writes latency percentiles, query counts and peak memory per endpoint to a JSON file'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per endpoint first')
+        parser.add_argument('--output', default='benchmark.json', help='JSON file to write')
+        parser.add_argument('--compare', help='Earlier JSON output to print the change against')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep the response cache between requests (default: measure the database path)')
+        parser.add_argument('--only', action='append', help='Scenario name to run (repeatable)')
+        parser.add_argument('--username', help='User for the auth-login scenario, skipped without credentials')
+        parser.add_argument('--password')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())['results']
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        ids = {
+            'client': Client.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'project': Project.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'resource': Resource.objects.order_by('pk').values_list('pk', flat=True).first(),
+        }
+        if None in ids.values():
+            raise CommandError('Needs at least one client, project and resource; run seed_scale first')
+        host = next((host for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost').lstrip('.')
+        self.client = TestClient(HTTP_HOST=host)
+        self.warm_cache = options['warm_cache']
+
+        results = {}
+        for name, method, path in SCENARIOS:
+            if options['only'] and name not in options['only']:
+                continue
+            body = None
+            iterations = options['iterations']
+            if name == 'auth-login':
+                if not (options['username'] and options['password']):
+                    self.stdout.write(f"{name:<20} skipped: pass --username and --password")
+                    continue
+                body = {'username': options['username'], 'password': options['password']}
+                iterations = max(1, iterations // LOGIN_ITERATION_DIVISOR)
+            request = (method, path.format(**ids), body)
+            results[name] = result = self.measure(request, options['warmup'], iterations)
+            self.report(name, result, baseline.get(name) if baseline else None)
+
+        output = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+            'warm_cache': self.warm_cache,
+            'rows': {
+                model._meta.model_name: model.objects.count()
+                for model in (Client, Resource, Project, Comment, ProjectLink)
+            },
+            'results': results,
+        }
+        Path(options['output']).write_text(json.dumps(output, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def send(self, method, path, body):
+        if not self.warm_cache:
+            cache.clear()
+        if method == 'post':
+            return self.client.post(path, body, content_type='application/json')
+        return self.client.get(path, HTTP_ACCEPT='application/json')
+
+    def measure(self, request, warmup, iterations):
+        for _ in range(warmup):
+            self.send(*request)
+        latencies = []
+        queries = 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = self.send(*request)
+                latencies.append(time.perf_counter() - started)
+            queries = max(queries, len(captured))
+        # Separately, as tracing allocations slows every request down
+        tracemalloc.start()
+        try:
+            self.send(*request)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'status': response.status_code,
+            'bytes': len(response.content),
+            **latency_summary(latencies),
+            'queries': queries,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, name, result, previous):
+        line = (
+            f"{name:<20} {result['status']}  p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+            f"{result['queries']:3d} queries  {result['peak_memory_kb']:9.1f}KB peak"
+        )
+        if previous:
+            change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100 if previous['p50_ms'] else 0
+            line += f"  p50 {change:+.0f}%  queries {result['queries'] - previous['queries']:+d}"
+        style = self.style.WARNING if result['status'] >= 400 else (lambda text: text)
+        self.stdout.write(style(line))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.authentication import CachedTokenAuthentication
+from api.benchmarks import percentile
+from api.views import LoginView
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures login latency and the per-request cost of token authentication, '
+        'uncached (DRF) and cached, for an existing user'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--logins', type=int, default=20, help='Logins to time (each hashes the password)')
+        parser.add_argument('--requests', type=int, default=2000, help='Authenticated requests per backend')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        login = LoginView.as_view()
+        credentials = {'username': options['username'], 'password': options['password']}
+
+        latencies = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(options['logins']):
+                started = time.perf_counter()
+                response = login(factory.post('/api/auth/login/', credentials, format='json'))
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f"Login failed with {response.status_code}: {response.data}")
+        self.report('login', latencies, len(queries) / options['logins'])
+
+        token = response.data['token']
+        for name, backend in (('uncached', TokenAuthentication()), ('cached', CachedTokenAuthentication())):
+            cache.clear()
+            latencies = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['requests']):
+                    request = Request(factory.get('/api/projects/', HTTP_AUTHORIZATION=f'Token {token}'))
+                    started = time.perf_counter()
+                    backend.authenticate(request)
+                    latencies.append(time.perf_counter() - started)
+            self.report(f'auth {name}', latencies, len(queries) / options['requests'])
+
+    def report(self, name, latencies, queries_each):
+        latencies.sort()
+        self.stdout.write(
+            f"{name:<14} p50 {percentile(latencies, 0.5) * 1000:8.3f}ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:8.3f}ms  "
+            f"{queries_each:.2f} queries each"
+        )
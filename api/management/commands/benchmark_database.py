@@ -0,0 +1,136 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connection, connections, transaction
+from django.utils import timezone
+from api.benchmarks import percentile
+from api.models import Project
+
+# Options the tuned SQLite configuration adds on top of Django's defaults
+SQLITE_TUNING_OPTIONS = ('transaction_mode', 'timeout', 'init_command')
+
+
+def baseline_settings(settings_dict):
+    """Django's defaults: no persistent connections, rollback journal, deferred transactions."""
+    options = dict(settings_dict['OPTIONS'])
+    options.pop('pool', None)
+    if settings_dict['ENGINE'].endswith('sqlite3'):
+        for key in SQLITE_TUNING_OPTIONS:
+            options.pop(key, None)
+        options['init_command'] = 'PRAGMA journal_mode=DELETE'
+    return {**settings_dict, 'CONN_MAX_AGE': 0, 'OPTIONS': options}
+
+
+def persistent_settings(settings_dict):
+    return {**baseline_settings(settings_dict), 'CONN_MAX_AGE': None}
+
+
+# Each mode maps the configured settings to the ones the benchmark runs with
+MODES = {
+    'baseline': baseline_settings,
+    'persistent': persistent_settings,
+    'tuned': dict,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs concurrent reads and writes against the configured database under each connection mode '
+        '(baseline, persistent, tuned) and reports throughput, latency and lock errors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent workers')
+        parser.add_argument('--operations', type=int, default=200, help='Operations per worker')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Fraction of operations that write')
+        parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated modes to compare')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = [mode for mode in modes if mode not in MODES]
+        if unknown:
+            raise CommandError(f"Unknown mode {unknown[0]!r}; choose from {', '.join(MODES)}")
+        self.project_ids = list(Project.objects.values_list('pk', flat=True)[:1000])
+        if not self.project_ids:
+            raise CommandError('No projects to benchmark against; import some data first')
+        # Switching the journal mode needs every other connection closed
+        connection.close()
+
+        self.stdout.write(
+            f"{connection.vendor}: {options['threads']} threads x {options['operations']} operations, "
+            f"{options['write_ratio']:.0%} writes"
+        )
+        for mode in modes:
+            with database_settings(MODES[mode](connection.settings_dict)) as settings_dict:
+                # Applies the mode's pragmas (e.g. the journal mode) before any worker connects
+                with ThreadPoolExecutor(1) as pool:
+                    pool.submit(self.prepare).result()
+                started = time.monotonic()
+                with ThreadPoolExecutor(options['threads']) as pool:
+                    results = list(pool.map(
+                        lambda _: self.worker(options['operations'], options['write_ratio']),
+                        range(options['threads']),
+                    ))
+                elapsed = time.monotonic() - started
+            latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+            errors = sum(worker_errors for _, worker_errors in results)
+            self.stdout.write(
+                f"{mode:<11} conn_max_age={settings_dict['CONN_MAX_AGE']!s:<5} "
+                f"{len(latencies) / elapsed:8.0f} ops/s  "
+                f"p50 {percentile(latencies, 0.5) * 1000:6.2f}ms  "
+                f"p95 {percentile(latencies, 0.95) * 1000:6.2f}ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:6.2f}ms  "
+                f"errors {errors}"
+            )
+
+    def prepare(self):
+        connection.ensure_connection()
+        connection.close()
+
+    def worker(self, operations, write_ratio):
+        latencies = []
+        errors = 0
+        rng = random.Random()
+        try:
+            for _ in range(operations):
+                started = time.monotonic()
+                try:
+                    if rng.random() < write_ratio:
+                        self.write(rng.choice(self.project_ids))
+                    else:
+                        self.read()
+                    latencies.append(time.monotonic() - started)
+                except OperationalError:
+                    # "database is locked" and friends
+                    errors += 1
+                # What the request_finished signal does at the end of each request
+                close_old_connections()
+        finally:
+            connection.close()
+        return latencies, errors
+
+    def read(self):
+        list(Project.objects.select_related('client').order_by('-updated_at', '-id')[:20])
+
+    def write(self, pk):
+        # Read-then-write in one transaction, like a serializer update
+        with transaction.atomic():
+            Project.objects.filter(pk=pk).values_list('status', flat=True).first()
+            Project.objects.filter(pk=pk).update(updated_at=timezone.now())
+
+
+@contextmanager
+def database_settings(settings_dict, alias=DEFAULT_DB_ALIAS):
+    """
+    Swap the settings new connections are opened with. Only connections
+    created inside the block, i.e. the worker threads', are affected.
+    """
+    original = connections.settings[alias]
+    connections.settings[alias] = settings_dict
+    try:
+        yield settings_dict
+    finally:
+        connections.settings[alias] = original
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from api import compression
+from api.benchmarks import latency_summary
+from api.models import Project
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import ProjectDetailSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Times encoding ProjectDetailSerializer payloads with the stdlib and orjson renderers and '
+        'compressing them with each available encoding, and reports sizes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=50,
+                            help='Projects in the payload, the most commented first')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        queryset = Project.objects.annotate(comments_total=Count('comments')).order_by('-comments_total')
+        queryset = ProjectDetailSerializer.setup_eager_loading(queryset)
+        data = ProjectDetailSerializer(queryset[:options['projects']], many=True).data
+        if not data:
+            raise CommandError('No projects; run seed_scale first')
+
+        renderers = [('stdlib', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', FastJSONRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed; timing the stdlib renderer only'))
+        baseline = None
+        for name, renderer in renderers:
+            content, result = self.measure(renderer.render, options['iterations'], data)
+            baseline = baseline or result
+            self.report(f'render {name}', len(content), result, baseline)
+        for encoding in compression.available_encodings():
+            compressed, result = self.measure(compression.compress, options['iterations'], content, encoding)
+            self.report(f'compress {encoding}', len(compressed), result)
+
+    def measure(self, func, iterations, *args):
+        latencies = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            output = func(*args)
+            latencies.append(time.perf_counter() - started)
+        return output, latency_summary(latencies)
+
+    def report(self, name, size, result, baseline=None):
+        line = f"{name:<16} {size:>10d} bytes  p50 {result['p50_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms"
+        if baseline and baseline is not result and result['p50_ms']:
+            line += f"  {baseline['p50_ms'] / result['p50_ms']:.1f}x faster"
+        self.stdout.write(line)
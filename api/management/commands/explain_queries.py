@@ -0,0 +1,106 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from api.views import ClientViewSet, ProjectViewSet, CommentViewSet, ProjectLinkViewSet, ResourceViewSet
+
+# Foreign key filters need a real id; EXISTING takes one from the ViewSet's own rows
+EXISTING = object()
+
+# Typical list requests issued by the dashboard, per ViewSet
+TYPICAL_QUERIES = [
+    (ClientViewSet, {}),
+    (ClientViewSet, {'company_name': 'Acme'}),
+    (ProjectViewSet, {}),
+    (ProjectViewSet, {'status': 'ACTIVE'}),
+    (ProjectViewSet, {'client': EXISTING}),
+    (ProjectViewSet, {'assigned_resource': EXISTING}),
+    (CommentViewSet, {}),
+    (CommentViewSet, {'project': EXISTING}),
+    (ProjectLinkViewSet, {}),
+    (ProjectLinkViewSet, {'project': EXISTING}),
+    (ResourceViewSet, {}),
+    (ResourceViewSet, {'is_active': 'true'}),
+]
+
+# Plan fragments that mean a whole table is read or sorted in memory
+FULL_SCAN_MARKERS = {
+    'sqlite': ['SCAN ', 'USE TEMP B-TREE'],
+    'postgresql': ['Seq Scan', 'Sort Method'],
+    'mysql': ['type: ALL', 'Using filesort'],
+}
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on each ViewSet's typical list queries and reports full scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not just the flagged ones')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        markers = FULL_SCAN_MARKERS.get(connection.vendor, [])
+        flagged = checked = 0
+
+        for viewset_class, params in TYPICAL_QUERIES:
+            label = f"{viewset_class.__name__} {self.describe(params)}"
+            params = self.resolve(viewset_class, params)
+            if params is None:
+                self.stdout.write(f"skipped    {label}: no rows to filter on")
+                continue
+            queryset = self.list_queryset(factory, viewset_class, params)
+            plan = queryset.explain()
+            checked += 1
+            scans = [line.strip() for line in plan.splitlines() if self.is_full_scan(line, markers)]
+
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {label}"))
+                for line in scans:
+                    self.stdout.write(f"    {line}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok         {label}"))
+            if options['verbose_plans']:
+                self.stdout.write(f"    {queryset.query}")
+                for line in plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if flagged:
+            self.stdout.write(self.style.WARNING(f"{flagged} of {checked} queries need a full scan or sort"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"All {checked} queries are served by indexes"))
+
+    def describe(self, params):
+        if not params:
+            return '(unfiltered)'
+        return ', '.join(
+            f"{key}={'<existing>' if value is EXISTING else value}" for key, value in params.items()
+        )
+
+    def resolve(self, viewset_class, params):
+        model = viewset_class.queryset.model
+        resolved = {}
+        for key, value in params.items():
+            if value is EXISTING:
+                rows = model.objects.filter(**{f'{key}__isnull': False})
+                value = rows.values_list(key, flat=True).first()
+                if value is None:
+                    return None
+            resolved[key] = value
+        return resolved
+
+    def list_queryset(self, factory, viewset_class, params):
+        """Build the queryset the ViewSet's list action would paginate."""
+        view = viewset_class()
+        view.action = 'list'
+        view.format_kwarg = None
+        view.kwargs = {}
+        view.request = Request(factory.get('/', params))
+        view.request.user = None
+        return view.filter_queryset(view.get_queryset())
+
+    def is_full_scan(self, line, markers):
+        # SQLite reports index-driven scans as "SCAN table USING [COVERING] INDEX"
+        if 'USING INDEX' in line or 'USING COVERING INDEX' in line:
+            return False
+        return any(marker in line for marker in markers)
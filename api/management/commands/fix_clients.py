@@ -1,61 +1,88 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from api.models import Client, UserProfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+from api import changelog
+from api.cache import bump_version
+from api.models import Client
+from api.usernames import allocate_usernames, bulk_create_users, client_username
+
 
 class Command(BaseCommand):
     help = 'Fixes clients with missing user associations by creating new users for them'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Clients repaired per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be created without writing')
+        parser.add_argument('--unusable-passwords', action='store_true',
+                            help='Create users without a password instead of hashing a random one')
+
     def handle(self, *args, **options):
-        # Find clients without users
-        clients_without_users = Client.objects.filter(user__isnull=True)
-        self.stdout.write(f"Found {clients_without_users.count()} clients without users")
-        
-        # Create users for each client
-        for client in clients_without_users:
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        # Find clients without users. Every batch commits on its own and
+        # repaired clients drop out of this filter, so re-running after a
+        # failure resumes where the last committed batch left off.
+        clients_without_users = Client.objects.filter(user__isnull=True).order_by('pk')
+        total = clients_without_users.count()
+        self.stdout.write(f"Found {total} clients without users")
+        if not total:
+            return
+
+        started = time.monotonic()
+        done = 0
+        last_pk = 0
+        while True:
+            batch = list(clients_without_users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
             try:
-                with transaction.atomic():
-                    # Create a new user based on the client company name
-                    username = client.company_name.lower().replace(' ', '_')[:30]
-                    # Add number suffix if username exists
-                    suffix = 1
-                    original_username = username
-                    while User.objects.filter(username=username).exists():
-                        username = f"{original_username[:27]}_{suffix}"
-                        suffix += 1
-                    
-                    # Create the user
-                    user = User.objects.create_user(
-                        username=username,
-                        email=client.contact_email or '',
-                        password=User.objects.make_random_password()
-                    )
-                    
-                    # Set names if available
-                    if client.contact_person:
-                        parts = client.contact_person.split(' ', 1)
-                        user.first_name = parts[0]
-                        if len(parts) > 1:
-                            user.last_name = parts[1]
-                        user.save()
-                    
-                    # Ensure the user has a profile
-                    if not hasattr(user, 'profile'):
-                        UserProfile.objects.create(user=user, role='CLIENT')
-                    else:
-                        user.profile.role = 'CLIENT'
-                        user.profile.save()
-                    
-                    # Associate the client with the user
-                    client.user = user
-                    client.save()
-                    
-                    self.stdout.write(self.style.SUCCESS(
-                        f"Created user {username} for client {client.company_name}"
-                    ))
+                self.repair(batch, options)
             except Exception as e:
-                self.stdout.write(self.style.ERROR(
-                    f"Error processing client {client.company_name}: {str(e)}"
+                raise CommandError(
+                    f"Batch starting at client id {batch[0].pk} failed: {e}. "
+                    f"{done} clients were repaired; re-run to resume."
+                ) from e
+            last_pk = batch[-1].pk
+            done += len(batch)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{done}/{total} clients ({done / total:.0%}), "
+                f"{done / elapsed if elapsed else done:.0f} clients/s"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Dry run: no changes were written"))
+        else:
+            bump_version('client', 'user')
+            self.stdout.write(self.style.SUCCESS("Completed fixing clients without users"))
+
+    def repair(self, batch, options):
+        # Names come from the contact person if available
+        rows = []
+        for client in batch:
+            parts = (client.contact_person or '').split(' ', 1)
+            rows.append((client_username(client.company_name), {
+                'email': client.contact_email or '',
+                'first_name': parts[0],
+                'last_name': parts[1] if len(parts) > 1 else '',
+            }))
+
+        if options['dry_run']:
+            for client, username in zip(batch, allocate_usernames([base for base, _ in rows])):
+                self.stdout.write(f"Would create user {username} for client {client.company_name}")
+            return
+
+        with transaction.atomic():
+            users = bulk_create_users(rows, role='CLIENT', usable_passwords=not options['unusable_passwords'])
+            for client, user in zip(batch, users):
+                client.user = user
+            Client.objects.bulk_update(batch, ['user'])
+            changelog.record('client', [client.pk for client in batch])
+        if options['verbosity'] > 1:
+            for client in batch:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Created user {client.user.username} for client {client.company_name}"
                 ))
-        
-        self.stdout.write(self.style.SUCCESS("Completed fixing clients without users")) 
\ No newline at end of file
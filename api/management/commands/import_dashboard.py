@@ -0,0 +1,322 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from api import changelog
+from api.bulk import create_projects
+from api.cache import bump_version
+from api.models import Client, Project, Resource
+from api.serializers import ProjectBulkItemSerializer
+from api.usernames import bulk_create_users, client_username, resource_username
+
+
+# Columns an import row may set on an existing client or resource
+CLIENT_FIELDS = ('contact_person', 'contact_email', 'client_type')
+RESOURCE_FIELDS = ('first_name', 'last_name', 'email', 'title')
+
+
+def read_rows(path):
+    """Read a list of dicts from a .json or .csv file."""
+    path = Path(path)
+    if not path.exists():
+        raise CommandError(f"{path} does not exist")
+    if path.suffix.lower() == '.json':
+        rows = json.loads(path.read_text(encoding='utf-8'))
+        if not isinstance(rows, list):
+            raise CommandError(f"{path} must contain a JSON list")
+        return rows
+    with path.open(newline='', encoding='utf-8') as f:
+        # Empty CSV cells mean "not set"
+        return [{key: value for key, value in row.items() if value} for row in csv.DictReader(f)]
+
+
+def resource_keys(row):
+    """Natural keys of a resource row: its email when it has one, first."""
+    name = ('name', row['first_name'], row['last_name'])
+    return [('email', row['email']), name] if row.get('email') else [name]
+
+
+def sync_users(profiles, fields):
+    """
+    Copy ``{user field: profile field}`` to the profiles' users where they
+    differ, in one ``bulk_update``. Blank profile values are not copied.
+    """
+    users = []
+    for profile in profiles:
+        user = profile.user
+        values = {name: getattr(profile, source) for name, source in fields.items() if getattr(profile, source)}
+        if any(getattr(user, name) != value for name, value in values.items()):
+            for name, value in values.items():
+                setattr(user, name, value)
+            users.append(user)
+    if users:
+        User.objects.bulk_update(users, list(fields))
+
+
+def chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports clients, resources and projects from CSV or JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', help='Clients file: company_name, contact_person, contact_email, client_type')
+        parser.add_argument('--resources', help='Resources file: first_name, last_name, email, title')
+        parser.add_argument('--projects', help=(
+            'Projects file: client (company name), project_number, description, status, '
+            'client_delivery_date, internal_due_date, resources ("First Last" names, ";"-separated)'
+        ))
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--unusable-passwords', action='store_true',
+                            help='Create users without a password instead of hashing a random one')
+
+    def handle(self, *args, **options):
+        if not any(options[kind] for kind in ('clients', 'resources', 'projects')):
+            raise CommandError('Pass at least one of --clients, --resources, --projects')
+        self.batch_size = options['batch_size']
+        self.unusable_passwords = options['unusable_passwords']
+
+        # Clients and resources first so projects can refer to them
+        for kind in ('clients', 'resources', 'projects'):
+            if options[kind]:
+                rows = read_rows(options[kind])
+                started = time.monotonic()
+                created, updated, skipped = getattr(self, f'import_{kind}')(rows)
+                elapsed = time.monotonic() - started
+                rate = (created + updated) / elapsed if elapsed else created + updated
+                self.stdout.write(self.style.SUCCESS(
+                    f"{kind}: created {created}, updated {updated}, skipped {skipped} "
+                    f"in {elapsed:.2f}s ({rate:.0f} rows/s)"
+                ))
+
+    def import_clients(self, rows):
+        """
+        Rows naming an existing company update its client; the others create
+        one. Only the fields a row sets are written, and rows with an unknown
+        client_type are skipped.
+        """
+        created = updated = skipped = 0
+        client_types = dict(Client.CLIENT_TYPE_CHOICES)
+        for batch_start in range(0, len(rows), self.batch_size):
+            batch = rows[batch_start:batch_start + self.batch_size]
+            names = {row['company_name'] for row in batch if row.get('company_name')}
+            existing = {
+                client.company_name: client
+                for client in Client.objects.filter(company_name__in=names).select_related('user')
+            }
+            changed = {}
+            pending = {}
+            for index, row in enumerate(batch, start=batch_start):
+                name = row.get('company_name')
+                if not name:
+                    skipped += 1
+                    continue
+                if row.get('client_type') and row['client_type'] not in client_types:
+                    skipped += 1
+                    errors = {'client_type': [f"{row['client_type']!r} is not a valid choice."]}
+                    self.stderr.write(f"clients row {index + 1}: {errors}")
+                    continue
+                values = {field: row[field] for field in CLIENT_FIELDS if row.get(field)}
+                if name in existing:
+                    client = existing[name]
+                    for field, value in values.items():
+                        setattr(client, field, value)
+                    changed[client.pk] = client
+                elif name in pending:
+                    # Repeated within the file: merge into the row to be created
+                    pending[name].update(values)
+                else:
+                    pending[name] = {'company_name': name, **values}
+            new_rows = list(pending.values())
+
+            with transaction.atomic():
+                if changed:
+                    self.update_clients(changed)
+                if new_rows:
+                    users = bulk_create_users([
+                        (client_username(row['company_name']), {'email': row.get('contact_email') or ''})
+                        for row in new_rows
+                    ], role='CLIENT', usable_passwords=not self.unusable_passwords)
+                    clients = Client.objects.bulk_create([
+                        Client(
+                            user=user,
+                            company_name=row['company_name'],
+                            contact_person=row.get('contact_person') or '',
+                            contact_email=row.get('contact_email') or '',
+                            client_type=row.get('client_type') or 'EXTERNAL',
+                        )
+                        for user, row in zip(users, new_rows)
+                    ])
+                    changelog.record('client', [client.pk for client in clients])
+            created += len(new_rows)
+            updated += len(changed)
+        if created or updated:
+            bump_version('client', 'user')
+        return created, updated, skipped
+
+    def update_clients(self, clients):
+        """Save the changed clients, ``{pk: client}``, and their users' emails."""
+        now = timezone.now()
+        for client in clients.values():
+            # bulk_update() leaves auto_now fields alone
+            client.updated_at = now
+        Client.objects.bulk_update(clients.values(), [*CLIENT_FIELDS, 'updated_at'])
+        # Client users are created with the contact email
+        sync_users(clients.values(), {'email': 'contact_email'})
+        changelog.record('client', list(clients))
+
+    def import_resources(self, rows):
+        """
+        Rows matching a resource by email, or by "First Last" when they have
+        no email (as projects refer to resources), update it; the others
+        create one. Only the fields a row sets are written.
+        """
+        created = updated = skipped = 0
+        for batch in chunks(rows, self.batch_size):
+            valid = [row for row in batch if row.get('first_name') and row.get('last_name')]
+            skipped += len(batch) - len(valid)
+            if not valid:
+                continue
+
+            existing = self.existing_resources(valid)
+            changed = {}
+            new_rows = []
+            pending = {}
+            for row in valid:
+                values = {field: row[field] for field in RESOURCE_FIELDS if row.get(field)}
+                key = resource_keys(row)[0]
+                if key in existing:
+                    resource = existing[key]
+                    for field, value in values.items():
+                        setattr(resource, field, value)
+                    changed[resource.pk] = resource
+                elif key in pending:
+                    # Repeated within the file: merge into the row to be created
+                    pending[key].update(values)
+                else:
+                    new_rows.append(values)
+                    for other in resource_keys(row):
+                        pending.setdefault(other, values)
+
+            with transaction.atomic():
+                if changed:
+                    self.update_resources(changed)
+                if new_rows:
+                    users = bulk_create_users([
+                        (
+                            resource_username(row['first_name'], row['last_name']),
+                            {
+                                'email': row.get('email') or '',
+                                'first_name': row['first_name'],
+                                'last_name': row['last_name'],
+                            },
+                        )
+                        for row in new_rows
+                    ], role='RESOURCE', usable_passwords=not self.unusable_passwords)
+                    resources = Resource.objects.bulk_create([
+                        Resource(
+                            user=user,
+                            first_name=row['first_name'],
+                            last_name=row['last_name'],
+                            email=row.get('email') or '',
+                            title=row.get('title') or '',
+                        )
+                        for user, row in zip(users, new_rows)
+                    ])
+                    changelog.record('resource', [resource.pk for resource in resources])
+            created += len(new_rows)
+            updated += len(changed)
+        if created or updated:
+            bump_version('resource', 'user')
+        return created, updated, skipped
+
+    def update_resources(self, resources):
+        """Save the changed resources, ``{pk: resource}``, and their users' names and emails."""
+        now = timezone.now()
+        for resource in resources.values():
+            # bulk_update() leaves auto_now fields alone
+            resource.updated_at = now
+        Resource.objects.bulk_update(resources.values(), [*RESOURCE_FIELDS, 'updated_at'])
+        sync_users(resources.values(), {'first_name': 'first_name', 'last_name': 'last_name', 'email': 'email'})
+        # Project rows carry the resources' names
+        assignments = Project.resources.through.objects.filter(resource_id__in=resources)
+        projects = set(assignments.values_list('project_id', flat=True))
+        changelog.record('resource', list(resources), projects=projects)
+
+    def existing_resources(self, rows):
+        """Resources matching any of the rows, by each of ``resource_keys()``, with one query."""
+        emails = {row['email'] for row in rows if row.get('email')}
+        names = Q(first_name__in={row['first_name'] for row in rows}, last_name__in={row['last_name'] for row in rows})
+        existing = {}
+        for resource in Resource.objects.filter(names | Q(email__in=emails)).select_related('user').order_by('pk'):
+            for key in resource_keys(vars(resource)):
+                existing.setdefault(key, resource)
+        return existing
+
+    def import_projects(self, rows):
+        created = skipped = 0
+        for batch_start in range(0, len(rows), self.batch_size):
+            batch = rows[batch_start:batch_start + self.batch_size]
+            clients = dict(
+                Client.objects.filter(company_name__in={row.get('client') for row in batch})
+                .values_list('company_name', 'id')
+            )
+            resources = self.resource_ids({
+                name for row in batch for name in self.split_names(row.get('resources'))
+            })
+
+            items = []
+            for index, row in enumerate(batch, start=batch_start):
+                names = self.split_names(row.get('resources'))
+                data = {key: value for key, value in row.items() if key not in ('client', 'resources')}
+                data['client'] = clients.get(row.get('client'))
+                data['resources'] = [resources[name] for name in names if name in resources]
+                serializer = ProjectBulkItemSerializer(data=data)
+                errors = {} if serializer.is_valid() else dict(serializer.errors)
+                unknown = [name for name in names if name not in resources]
+                if row.get('client') not in clients:
+                    errors['client'] = [f"Unknown client {row.get('client')!r}"]
+                if unknown:
+                    errors['resources'] = [f"Unknown resource {unknown[0]!r}"]
+                if errors:
+                    skipped += 1
+                    self.stderr.write(f"projects row {index + 1}: {errors}")
+                    continue
+                items.append((index, serializer.validated_data))
+
+            if items:
+                results = create_projects(items)
+                for result in results:
+                    if 'errors' in result:
+                        skipped += 1
+                        self.stderr.write(f"projects row {result['index'] + 1}: {result['errors']}")
+                    else:
+                        created += 1
+        return created, 0, skipped
+
+    def split_names(self, value):
+        if not value:
+            return []
+        if isinstance(value, list):
+            return [name.strip() for name in value if name.strip()]
+        return [name.strip() for name in value.split(';') if name.strip()]
+
+    def resource_ids(self, names):
+        """Map "First Last" to an active resource id with one query."""
+        if not names:
+            return {}
+        first_names = {name.split(' ', 1)[0] for name in names}
+        ids = {}
+        for pk, first, last in Resource.objects.filter(is_active=True, first_name__in=first_names).values_list(
+            'pk', 'first_name', 'last_name'
+        ):
+            ids.setdefault(f"{first} {last}", pk)
+        return ids
@@ -0,0 +1,88 @@
+import http.client
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmarks import percentile
+
+# The dashboard's hot read endpoints; {project} is replaced with a real id
+DEFAULT_PATHS = [
+    '/api/projects/',
+    '/api/projects/{project}/',
+    '/api/comments/?project={project}',
+    '/api/links/?project={project}',
+    '/api/dashboard/summary/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load tests running API servers, e.g. the same database behind '
+        '"uvicorn config.asgi:application" and "gunicorn config.wsgi", and reports throughput and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='name=base_url pairs, e.g. asgi=http://127.0.0.1:8001')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent connections')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per target')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+        parser.add_argument('--project', type=int, default=1, help='Project id used in the default paths')
+
+    def handle(self, *args, **options):
+        paths = [path.format(project=options['project']) for path in options['paths'] or DEFAULT_PATHS]
+        targets = []
+        for target in options['targets']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError(f"Expected name=http://host:port, got {target!r}")
+            targets.append((name, urlsplit(url)))
+
+        self.stdout.write(
+            f"{options['requests']} requests per target, {options['concurrency']} connections, "
+            f"{len(paths)} paths"
+        )
+        for name, url in targets:
+            per_worker = -(-options['requests'] // options['concurrency'])
+            started = time.monotonic()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                results = list(pool.map(
+                    lambda offset: self.worker(url, paths, offset, per_worker),
+                    range(options['concurrency']),
+                ))
+            elapsed = time.monotonic() - started
+            latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+            errors = sum(worker_errors for _, worker_errors in results)
+            self.stdout.write(
+                f"{name:<8} {len(latencies) / elapsed:8.0f} req/s  "
+                f"p50 {percentile(latencies, 0.5) * 1000:7.2f}ms  "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms  "
+                f"errors {errors}"
+            )
+
+    def worker(self, url, paths, offset, count):
+        """One keep-alive connection issuing ``count`` requests round-robin over ``paths``."""
+        latencies = []
+        errors = 0
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        requests = cycle(paths[offset % len(paths):] + paths[:offset % len(paths)])
+        try:
+            for _ in range(count):
+                path = url.path.rstrip('/') + next(requests)
+                started = time.monotonic()
+                try:
+                    conn.request('GET', path, headers={'Accept': 'application/json'})
+                    response = conn.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    conn.close()
+                    continue
+                if response.status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.monotonic() - started)
+        finally:
+            conn.close()
+        return latencies, errors
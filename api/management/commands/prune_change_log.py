@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api import changelog
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes sync change log entries older than --days; clients holding an older token '
+        'get 410 Gone from /api/sync/ and reload'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SYNC_RETENTION_DAYS,
+            help='Keep entries from this many days (default SYNC_RETENTION_DAYS)',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        deleted = changelog.prune(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change log entries"))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index from the project and comment tables'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        started = time.monotonic()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {type(backend).__name__} index in {time.monotonic() - started:.2f}s"
+        ))
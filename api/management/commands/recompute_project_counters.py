@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api import changelog, counters
+from api.cache import bump_version
+from api.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        'Recounts the comment, link and resource counters and last activity of projects in batches '
+        'and rewrites the ones that drifted (e.g. after raw SQL or bulk inserts that skip the signals)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Projects checked per query')
+        parser.add_argument('--project', type=int, action='append', help='Only this project id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted projects without fixing them')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        queryset = Project.objects.order_by('pk')
+        if options['project']:
+            queryset = queryset.filter(pk__in=options['project'])
+
+        checked = repaired = 0
+        last = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last).values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last = batch[-1]
+            checked += len(batch)
+            drifted = counters.drifted(Project.objects.filter(pk__in=batch))
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    counters.recount(drifted)
+                    changelog.record('project', drifted)
+            repaired += len(drifted)
+            if options['verbosity'] > 1 and drifted:
+                self.stdout.write(f"drifted: {', '.join(map(str, drifted))}")
+
+        if repaired and not options['dry_run']:
+            bump_version('project')
+        verb = 'would repair' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} projects, {verb} {repaired}"))
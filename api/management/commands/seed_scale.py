@@ -0,0 +1,197 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from api import counters
+from api.cache import bump_version
+from api.models import Client, Comment, Project, ProjectLink, Resource
+from api.search import get_backend
+from api.usernames import bulk_create_users, client_username, resource_username
+
+WORDS = (
+    'brand launch website redesign campaign video edit review draft final assets copy layout print social '
+    'banner landing page mockup feedback revision approval storyboard logo palette typography photo shoot '
+    'budget schedule delivery client meeting notes update render export proof mobile email newsletter'
+).split()
+
+FIRST_NAMES = 'Ada Alan Grace Linus Margaret Ken Barbara Dennis Radia Edsger Frances John Hedy Tim Katherine'.split()
+LAST_NAMES = 'Lovelace Turing Hopper Torvalds Hamilton Thompson Liskov Ritchie Perlman Dijkstra Allen Backus Lamarr'.split()
+
+# Roughly the mix of a working dashboard: most projects queued or active
+STATUS_WEIGHTS = {
+    'ACTIVE': 30, 'IN_QUEUE': 25, 'FOR_REVIEW': 10, 'CONCEPTUAL': 10, 'COMPLETE': 20, 'PAUSED': 5,
+}
+
+ProjectResource = Project.resources.through
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates synthetic clients, resources, projects (with resource assignments), comments and links '
+        'with bulk inserts, for benchmarking at scale. Rows bypass the sync change log; sync clients reload. '
+        'Project counters are recounted once at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=1000)
+        parser.add_argument('--resources', type=int, default=200)
+        parser.add_argument('--projects', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--links', type=int, default=200_000)
+        parser.add_argument('--resources-per-project', type=int, default=2, help='Resources assigned to each project')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert transaction')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data')
+        parser.add_argument('--skip-search-index', action='store_true',
+                            help='Do not rebuild the full-text index afterwards')
+
+    def handle(self, *args, **options):
+        if options['projects'] and not options['clients'] and not Client.objects.exists():
+            raise CommandError('Projects need clients; pass --clients')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Unique per run, so seeding twice adds rows instead of colliding on company names
+        self.tag = timezone.now().strftime('%Y%m%d%H%M%S')
+
+        client_ids = self.timed('clients', self.seed_clients, options['clients'])
+        resource_ids = self.timed('resources', self.seed_resources, options['resources'])
+        client_ids = client_ids or list(Client.objects.values_list('pk', flat=True))
+        resource_ids = resource_ids or list(Resource.objects.filter(is_active=True).values_list('pk', flat=True))
+        project_ids = self.timed(
+            'projects', self.seed_projects, options['projects'], client_ids, resource_ids,
+            min(options['resources_per_project'], len(resource_ids)),
+        )
+        project_ids = project_ids or list(Project.objects.values_list('pk', flat=True))
+        if project_ids:
+            author_ids = list(Resource.objects.values_list('user_id', flat=True)[:500])
+            self.timed('comments', self.seed_comments, options['comments'], project_ids, author_ids)
+            self.timed('links', self.seed_links, options['links'], project_ids, author_ids)
+            self.timed('project counters', self.count_activity, project_ids)
+
+        bump_version('client', 'resource', 'project', 'user')
+        if not options['skip_search_index']:
+            self.timed('search index', get_backend().rebuild)
+
+    def timed(self, kind, seed, *args):
+        started = time.monotonic()
+        result = seed(*args)
+        elapsed = time.monotonic() - started
+        if result is None:
+            self.stdout.write(self.style.SUCCESS(f"{kind}: done in {elapsed:.2f}s"))
+            return result
+        # Seeders return the new ids, or just a count for the largest tables
+        created = result if isinstance(result, int) else len(result)
+        rate = created / elapsed if elapsed else created
+        self.stdout.write(self.style.SUCCESS(f"{kind}: created {created} in {elapsed:.2f}s ({rate:.0f} rows/s)"))
+        return result
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def text(self, low, high):
+        return ' '.join(self.rng.choices(WORDS, k=self.rng.randint(low, high))).capitalize()
+
+    def seed_clients(self, count):
+        ids = []
+        for batch in self.batches(count):
+            names = [f"Client {self.tag}-{index:06d}" for index in batch]
+            with transaction.atomic():
+                users = bulk_create_users(
+                    [(client_username(name), {}) for name in names], role='CLIENT', usable_passwords=False,
+                )
+                clients = Client.objects.bulk_create([
+                    Client(
+                        user=user,
+                        company_name=name,
+                        contact_person=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}",
+                        client_type=self.rng.choice(('INTERNAL', 'EXTERNAL', 'EXTERNAL', 'EXTERNAL')),
+                    )
+                    for user, name in zip(users, names)
+                ])
+            ids += [client.pk for client in clients]
+        return ids
+
+    def seed_resources(self, count):
+        ids = []
+        for batch in self.batches(count):
+            names = [(self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)) for _ in batch]
+            with transaction.atomic():
+                users = bulk_create_users(
+                    [(resource_username(first, last), {'first_name': first, 'last_name': last}) for first, last in names],
+                    role='RESOURCE', usable_passwords=False,
+                )
+                resources = Resource.objects.bulk_create([
+                    Resource(
+                        user=user, first_name=first, last_name=last,
+                        title=self.rng.choice(('Designer', 'Editor', 'Producer')),
+                    )
+                    for user, (first, last) in zip(users, names)
+                ])
+            ids += [resource.pk for resource in resources]
+        return ids
+
+    def seed_projects(self, count, client_ids, resource_ids, per_project):
+        ids = []
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        today = timezone.localdate()
+        for batch in self.batches(count):
+            projects = [
+                Project(
+                    project_number=f"P-{self.tag}-{index:07d}",
+                    client_id=self.rng.choice(client_ids),
+                    description=self.text(4, 16),
+                    status=self.rng.choices(statuses, weights)[0],
+                    client_delivery_date=today + timedelta(days=self.rng.randint(-180, 180)),
+                    internal_due_date=today + timedelta(days=self.rng.randint(-180, 170)),
+                    resource_count=per_project,
+                )
+                for index in batch
+            ]
+            with transaction.atomic():
+                Project.objects.bulk_create(projects)
+                ProjectResource.objects.bulk_create([
+                    ProjectResource(project_id=project.pk, resource_id=resource_id)
+                    for project in projects
+                    for resource_id in self.rng.sample(resource_ids, per_project)
+                ])
+            ids += [project.pk for project in projects]
+        return ids
+
+    def seed_comments(self, count, project_ids, author_ids):
+        for batch in self.batches(count):
+            comments = [
+                Comment(
+                    project_id=self.rng.choice(project_ids),
+                    user_id=self.rng.choice(author_ids) if author_ids else None,
+                    text=self.text(3, 30),
+                )
+                for _ in batch
+            ]
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+        return count
+
+    def seed_links(self, count, project_ids, author_ids):
+        for batch in self.batches(count):
+            links = [
+                ProjectLink(
+                    project_id=self.rng.choice(project_ids),
+                    url=f"https://files.example.com/{self.tag}/{index}",
+                    description=self.text(1, 4),
+                    added_by_id=self.rng.choice(author_ids) if author_ids else None,
+                )
+                for index in batch
+            ]
+            with transaction.atomic():
+                ProjectLink.objects.bulk_create(links)
+        return count
+
+    def count_activity(self, project_ids):
+        # Comments and links were bulk inserted past the counter signals
+        for batch in self.batches(len(project_ids)):
+            with transaction.atomic():
+                counters.recount(project_ids[batch.start:batch.stop])
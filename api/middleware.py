@@ -0,0 +1,183 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from . import compression, timing
+from .routers import PIN_COOKIE, PIN_KEY, authenticated_user, begin_request, end_request
+
+performance_logger = logging.getLogger('api.performance')
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes for replica routing. Unsafe requests run entirely on
+    the primary and then pin their client (by cookie) and user (by cache
+    entry) to it for ``REPLICA_PIN_SECONDS``, longer than replicas lag.
+    """
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        is_write, token = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        if is_write:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        is_write, token = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        if is_write:
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def begin(self, request):
+        is_write = request.method not in self.SAFE_METHODS
+        return is_write, begin_request(request, pinned=is_write or self.has_pin_cookie(request))
+
+    def has_pin_cookie(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def pin(self, request, response):
+        seconds = settings.REPLICA_PIN_SECONDS
+        response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
+        # DRF puts the user it authenticated back on the Django request
+        user = authenticated_user(request)
+        if user is not None:
+            cache.set(PIN_KEY.format(user.pk), True, seconds)
+
+
+class PerformanceMiddleware:
+    """
+    Times each request (SQL, view and serializer code, rendering) and
+    reports it in a ``Server-Timing`` header, the slow request and query
+    log and the per-endpoint counters; see api/timing.py. Goes first in
+    MIDDLEWARE so the total covers the other middleware too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_timing, token = timing.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.end_request(token)
+        return self.report(request, response, request_timing)
+
+    async def __acall__(self, request):
+        request_timing, token = timing.begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timing.end_request(token)
+        return self.report(request, response, request_timing)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_timing = timing.current_timing()
+        if request_timing is not None:
+            request_timing.start_view(timing.view_label(view_func, request.method))
+
+    def process_template_response(self, request, response):
+        # Runs between the view and rendering
+        request_timing = timing.current_timing()
+        if request_timing is not None:
+            request_timing.finish_view()
+            response.add_post_render_callback(request_timing.finish_render)
+        return response
+
+    def report(self, request, response, request_timing):
+        durations = request_timing.durations()
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={durations["db"]:.1f};desc="{request_timing.queries} queries", '
+                f'app;dur={durations["app"]:.1f}, render;dur={durations["render"]:.1f}, '
+                f'total;dur={durations["total"]:.1f}'
+            )
+        # Unrouted paths share one entry, so the counters stay bounded
+        endpoint = f"{request.method} {request_timing.view or 'unrouted'}"
+        timing.record_request(endpoint, response.status_code, request_timing.queries, durations)
+
+        view = request_timing.view or '-'
+        for sql, duration in request_timing.slow_queries:
+            performance_logger.warning('slow query', extra={
+                'view': view, 'path': request.path, 'duration_ms': round(duration * 1000, 1), 'sql': sql,
+            })
+        if durations['total'] >= settings.SLOW_REQUEST_MS:
+            performance_logger.warning('slow request', extra={
+                'view': view, 'method': request.method, 'path': request.path, 'status': response.status_code,
+                'queries': request_timing.queries,
+                **{f'{name}_ms': round(value, 1) for name, value in durations.items()},
+            })
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses large text responses with brotli or gzip, whichever the
+    client accepts and this process supports; see api/compression.py.
+    Goes right after PerformanceMiddleware so the timings include it.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if not compression.is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+        content = compression.compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # The bytes differ from the identity response's; a strong validator
+        # would claim they are the same
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_client_client_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['project', '-created_at', '-id'], name='comment_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-updated_at', '-id'], name='project_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['client', '-updated_at', '-id'], name='project_client_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', '-updated_at', '-id'], name='project_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['assigned_resource', '-updated_at', '-id'], name='project_assigned_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectlink',
+            index=models.Index(fields=['-created_at', '-id'], name='link_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectlink',
+            index=models.Index(fields=['project', '-created_at', '-id'], name='link_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['first_name', 'last_name'], name='resource_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['is_active', 'first_name', 'last_name'], name='resource_active_name_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+FTS_TABLE = 'api_search'
+
+
+def has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_table(apps, schema_editor):
+    # Other databases use the LIKE fallback backend, which needs no table
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or not has_fts5(connection):
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, project_id UNINDEXED, number, client, body, "
+        "tokenize = 'porter unicode61')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, kind, object_id, project_id, number, client, body) "
+        "SELECT p.id * 2, 'project', p.id, p.id, p.project_number, c.company_name, p.description "
+        "FROM api_project p INNER JOIN api_client c ON p.client_id = c.id"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, kind, object_id, project_id, number, client, body) "
+        "SELECT id * 2 + 1, 'comment', id, project_id, '', '', text FROM api_comment"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('comment', 'Comment'), ('link', 'Project link'), ('resource', 'Resource'), ('client', 'Client')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['created_at'], name='changelog_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DateTimeField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_counters(apps, schema_editor):
+    # The same values as api.counters.expected_counters(), for the historical models
+    Project = apps.get_model('api', 'Project')
+    children = {
+        'comment_count': apps.get_model('api', 'Comment'),
+        'link_count': apps.get_model('api', 'ProjectLink'),
+        'resource_count': Project.resources.through,
+    }
+    values = {}
+    for field, model in children.items():
+        rows = model.objects.filter(project_id=OuterRef('pk')).order_by().values('project_id')
+        values[field] = Coalesce(Subquery(rows.annotate(total=Count('pk')).values('total')), Value(0))
+    comment, link = (
+        Subquery(model.objects.filter(project_id=OuterRef('pk')).order_by('-created_at').values('created_at')[:1])
+        for model in (children['comment_count'], children['link_count'])
+    )
+    values['last_activity_at'] = Greatest(Coalesce(comment, link), Coalesce(link, comment), output_field=DateTimeField())
+    Project.objects.using(schema_editor.connection.alias).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_change_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, help_text='Newest comment or link', null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='link_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='resource_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-comment_count', '-id'], name='project_comment_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-link_count', '-id'], name='project_link_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='project_last_activity_idx'),
+        ),
+    ]
@@ -6,6 +6,15 @@ from django.dispatch import receiver
 
 # Create your models here.
 
+class UserProfileManager(models.Manager):
+    def bulk_create_for(self, users, role):
+        """
+        Create profiles for users inserted with bulk_create, which does not
+        send the post_save signal that normally creates them.
+        """
+        return self.bulk_create([self.model(user=user, role=role) for user in users])
+
+
 class UserProfile(models.Model):
     """
     Extends the built-in Django User model with additional fields.
@@ -19,6 +28,21 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='CLIENT')
     
+    objects = UserProfileManager()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role = instance.role
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_role = self.role
+    
+    def has_changed(self):
+        return self._state.adding or self.role != getattr(self, '_loaded_role', None)
+    
     def __str__(self):
         return f"{self.user.username} ({self.get_role_display()})"
 
@@ -63,6 +87,10 @@ class Resource(models.Model):
     
     class Meta:
         ordering = ['first_name', 'last_name']
+        indexes = [
+            models.Index(fields=['first_name', 'last_name'], name='resource_name_idx'),
+            models.Index(fields=['is_active', 'first_name', 'last_name'], name='resource_active_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -109,15 +137,84 @@ class Project(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized from comments, links and resources; kept current by
+    # api/counters.py and repaired by recompute_project_counters
+    comment_count = models.PositiveIntegerField(default=0)
+    link_count = models.PositiveIntegerField(default=0)
+    resource_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True, help_text="Newest comment or link")
     
     class Meta:
         ordering = ['-updated_at']
+        # Match the API's filters, each followed by the list ordering (-updated_at, -id)
+        indexes = [
+            models.Index(fields=['-updated_at', '-id'], name='project_updated_idx'),
+            models.Index(fields=['client', '-updated_at', '-id'], name='project_client_updated_idx'),
+            models.Index(fields=['status', '-updated_at', '-id'], name='project_status_updated_idx'),
+            models.Index(fields=['assigned_resource', '-updated_at', '-id'], name='project_assigned_updated_idx'),
+            # ?ordering= on the counters, with -id breaking ties
+            models.Index(fields=['-comment_count', '-id'], name='project_comment_count_idx'),
+            models.Index(fields=['-link_count', '-id'], name='project_link_count_idx'),
+            models.Index(fields=['-last_activity_at', '-id'], name='project_last_activity_idx'),
+        ]
+    
+    # Fields whose changes are published as activity events
+    TRACKED_FIELDS = ('status', 'assigned_resource_id')
+    # Only ever written with F() updates and recounts (api/counters.py)
+    COUNTER_FIELDS = ('comment_count', 'link_count', 'resource_count', 'last_activity_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: instance.__dict__.get(name) for name in cls.TRACKED_FIELDS}
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {name: self.__dict__.get(name) for name in self.TRACKED_FIELDS}
+    
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if update_fields is None:
+            # A stale instance must not write back counters changed since it
+            # was loaded. Only the UPDATE leaves them out: if the row is gone,
+            # save() inserts it whole, as usual
+            values = [value for value in values if value[0].name not in self.COUNTER_FIELDS]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def changed_fields(self):
+        """Tracked fields whose value differs from the one loaded from the database."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return []
+        return [name for name in self.TRACKED_FIELDS if name in self.__dict__ and self.__dict__[name] != loaded[name]]
     
     def __str__(self):
         return f"{self.project_number or 'No ID'} - {self.client.company_name}"
 
 
-class Comment(models.Model):
+class ProjectChild:
+    """
+    Remembers the project a comment or link was loaded with, so the
+    counters can tell a move to another project from an edit.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_project_id = self.project_id
+
+    def moved_from(self):
+        """The previous project's id if the project changed, else None."""
+        loaded = getattr(self, '_loaded_project_id', None)
+        return loaded if loaded is not None and loaded != self.project_id else None
+
+
+class Comment(ProjectChild, models.Model):
     """
     Represents a comment on a project.
     """
@@ -128,12 +225,16 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+            models.Index(fields=['project', '-created_at', '-id'], name='comment_project_created_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.username if self.user else 'Unknown'} on {self.project}"
 
 
-class ProjectLink(models.Model):
+class ProjectLink(ProjectChild, models.Model):
     """
     Represents a URL link associated with a project.
     """
@@ -143,18 +244,62 @@ class ProjectLink(models.Model):
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='added_links')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='link_created_idx'),
+            models.Index(fields=['project', '-created_at', '-id'], name='link_project_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.description or self.url} for {self.project}"
 
+class ChangeLogEntry(models.Model):
+    """
+    One write to a synced model, appended in the same transaction as the
+    write. Ids only grow, so the last id a client has seen is its sync token
+    for ``/api/sync/``.
+    """
+    KIND_CHOICES = (
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+        ('link', 'Project link'),
+        ('resource', 'Resource'),
+        ('client', 'Client'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['created_at'], name='changelog_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{'Deleted' if self.deleted else 'Changed'} {self.kind} {self.object_id}"
+
+# Set on a User before its first save to create its profile with that role
+PROFILE_ROLE_ATTR = '_profile_role'
+
+
 # Signal to create a UserProfile when a User is created
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        role = getattr(instance, PROFILE_ROLE_ATTR, None) or 'CLIENT'
+        instance.profile = UserProfile.objects.create(user=instance, role=role)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    # Users from bulk_create, or from before these signals, get theirs now
     if not hasattr(instance, 'profile'):
         UserProfile.objects.create(user=instance)
-    else:
+    # Only write a profile that was edited; plain user saves (e.g.
+    # last_login updates) leave it alone
+    elif instance.profile.has_changed():
         instance.profile.save()
@@ -0,0 +1,201 @@
+from django.core.paginator import InvalidPage, Page
+from rest_framework import filters, pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+MAX_PAGE_SIZE = 100
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """
+    Page number pagination with a client-controlled page size.
+
+    ``?count=false`` skips the ``COUNT(*)`` query: one extra row is fetched to
+    find out whether there is a next page and ``count`` is left out of the response.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    count_query_param = 'count'
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, 'true').lower() not in ('false', '0', 'no')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.with_count = self.wants_count(request)
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        bounds = self.page_bounds(request, with_count=False)
+        if bounds is None:
+            return None
+        page_number, page_size, start, stop = bounds
+        return self.paginate_rows(request, list(queryset[start:stop]), page_number, page_size)
+
+    def page_window(self, request):
+        """
+        The requested ``(page_number, page_size)``, validated without running
+        a query. ``page_size`` is None when pagination is turned off.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None, None
+        try:
+            page_number = pagination._positive_int(request.query_params.get(self.page_query_param) or 1, strict=True)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        return page_number, page_size
+
+    def page_bounds(self, request, with_count):
+        """
+        ``(page_number, page_size, start, stop)``: the slice of rows to fetch
+        for the requested page, with the extra row that tells whether there
+        is a next page when there is no count. None when pagination is off.
+        """
+        page_number, page_size = self.page_window(request)
+        if not page_size:
+            return None
+        start = (page_number - 1) * page_size
+        return page_number, page_size, start, start + page_size + (0 if with_count else 1)
+
+    def paginate_rows(self, request, rows, page_number, page_size, count=None):
+        """
+        Build the page from rows already fetched for ``page_window()``: one
+        page and the total ``count``, or, without a count, one extra row.
+        """
+        self.request = request
+        self.with_count = count is not None
+        if self.with_count:
+            paginator = self.django_paginator_class([], page_size)
+            paginator.count = count
+            try:
+                paginator.validate_number(page_number)
+            except InvalidPage as exc:
+                raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+            self.page = Page(rows, page_number, paginator)
+            if paginator.num_pages > 1 and self.template is not None:
+                self.display_page_controls = True
+            return rows
+
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message)
+        self.page_number = page_number
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.with_count:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.with_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.with_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_html_context(self):
+        if self.with_count:
+            return super().get_html_context()
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+            'page_links': [],
+        }
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination over the view's ``cursor_ordering``.
+
+    The first field is the keyset position and the trailing ``id`` keeps rows
+    with equal timestamps in a stable order. No count query is ever run.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        param = StableOrderingFilter.ordering_param
+        if request.query_params.get(param):
+            # Keysets need an ordering whose values do not change under the cursor
+            raise ValidationError({param: ['Not supported with cursor pagination.']})
+        return tuple(view.cursor_ordering)
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    ``?ordering=`` with ``-id`` appended, so rows with equal values keep
+    their order from page to page (and match the ``(field, -id)`` indexes).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or [])
+        if ordering and not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering.append('-id')
+        return ordering
+
+
+class DashboardPagination(pagination.BasePagination):
+    """
+    Default pagination for the API.
+
+    Uses page numbers unless the request asks for ``?pagination=cursor`` (or
+    carries a ``cursor``) on a view that declares ``cursor_ordering``.
+    """
+    page_class = PageNumberPagination
+    cursor_class = CursorPagination
+    mode_query_param = 'pagination'
+
+    def wants_cursor(self, request, view):
+        if not getattr(view, 'cursor_ordering', None):
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.cursor_class() if self.wants_cursor(request, view) else self.page_class()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.page_class().get_schema_operation_parameters(view)
+        if getattr(view, 'cursor_ordering', None):
+            parameters.append({
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            })
+        return parameters
+
+    @property
+    def display_page_controls(self):
+        return getattr(getattr(self, 'delegate', None), 'display_page_controls', False)
+
+    def to_html(self):
+        return self.delegate.to_html()
@@ -0,0 +1,99 @@
+"""
+Read-replica routing.
+
+Reads go to a replica (``settings.REPLICA_DATABASES``) only while serving a
+safe-method request that ReplicaPinningMiddleware has not pinned to the
+primary. Everything else, including writes, unsafe requests, management
+commands and any request made within ``REPLICA_PIN_SECONDS`` of the same
+client's or user's last write, uses ``default``.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+
+PIN_COOKIE = 'primary_pin'
+PIN_KEY = 'api:primary-pin:{}'
+
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def authenticated_user(request):
+    """
+    The user DRF or the session has already resolved, without triggering a
+    lookup: routing must not run queries of its own.
+    """
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is not None and user.is_authenticated:
+        return user
+    return None
+
+
+class RequestState:
+    """Routing decision for one request, kept in a context variable."""
+
+    def __init__(self, request, pinned):
+        self.request = request
+        self.pinned = pinned
+        self.checked_user = None
+
+    def use_primary(self):
+        if self.pinned:
+            return True
+        user = authenticated_user(self.request)
+        if user is not None and user.pk != self.checked_user:
+            # Checked once per request, as soon as authentication has run
+            self.checked_user = user.pk
+            self.pinned = bool(cache.get(PIN_KEY.format(user.pk)))
+        return self.pinned
+
+
+def begin_request(request, pinned):
+    return _request_state.set(RequestState(request, pinned))
+
+
+def end_request(token):
+    _request_state.reset(token)
+
+
+def pin_to_primary():
+    """Send the rest of the current request's reads to the primary."""
+    state = _request_state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def reads_from_replica():
+    state = _request_state.get()
+    return bool(replica_aliases()) and state is not None and not state.use_primary()
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(replica_aliases())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,237 @@
+"""
+Full-text search over projects (number, description, client name) and
+comment text.
+
+The index is kept up to date from model signals. ``SEARCH_BACKEND`` picks
+the implementation; by default SQLite databases use the FTS5 table created
+by migration 0005 and other databases fall back to ``LIKE`` queries.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from .models import Client, Project, Comment
+
+FTS_TABLE = 'api_search'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+
+def project_rowid(pk):
+    return pk * 2
+
+
+def comment_rowid(pk):
+    return pk * 2 + 1
+
+
+class SearchBackend:
+    """
+    Interface for search backends. Hits are dicts with ``type``
+    (``project`` or ``comment``), ``id``, ``project``, ``rank`` (lower is
+    better) and an HTML ``snippet`` with matches wrapped in ``<mark>``.
+    """
+
+    def index_projects(self, projects):
+        pass
+
+    def remove_projects(self, pks):
+        pass
+
+    def index_comments(self, comments):
+        pass
+
+    def remove_comments(self, pks):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, limit):
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Searches the ``api_search`` FTS5 table. Projects and comments share the
+    table; the rowid encodes the kind so updates are primary-key lookups.
+    """
+    COLUMNS = ['kind', 'object_id', 'project_id', 'number', 'client', 'body']
+
+    def write(self, rows):
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {', '.join(self.COLUMNS)}) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+
+    def delete(self, rowids):
+        if not rowids:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(rowid,) for rowid in rowids])
+
+    def index_projects(self, projects):
+        client_names = {p.client_id: p.client.company_name for p in projects if Project.client.is_cached(p)}
+        missing = {p.client_id for p in projects} - set(client_names)
+        if missing:
+            client_names.update(Client.objects.filter(pk__in=missing).values_list('pk', 'company_name'))
+        self.write([
+            (project_rowid(p.pk), 'project', p.pk, p.pk, p.project_number, client_names.get(p.client_id, ''), p.description)
+            for p in projects
+        ])
+
+    def remove_projects(self, pks):
+        self.delete([project_rowid(pk) for pk in pks])
+
+    def index_comments(self, comments):
+        self.write([
+            (comment_rowid(c.pk), 'comment', c.pk, c.project_id, '', '', c.text)
+            for c in comments
+        ])
+
+    def remove_comments(self, pks):
+        self.delete([comment_rowid(pk) for pk in pks])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(REBUILD_PROJECTS_SQL)
+            cursor.execute(REBUILD_COMMENTS_SQL)
+
+    def match_expression(self, query):
+        # Quote every word so user input can never be FTS syntax; * matches prefixes
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+    def search(self, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        # snippet() column -1 picks the best matching column for each row
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT kind, object_id, project_id, bm25({FTS_TABLE}, 0, 0, 0, 4.0, 2.0, 1.0) AS score, "
+                f"snippet({FTS_TABLE}, -1, %s, %s, '…', 12) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY score LIMIT %s",
+                ['\x02', '\x03', expression, limit],
+            )
+            rows = cursor.fetchall()
+        return [
+            {'type': kind, 'id': object_id, 'project': project_id, 'rank': score, 'snippet': highlight(snippet)}
+            for kind, object_id, project_id, score, snippet in rows
+        ]
+
+
+def highlight(snippet):
+    # The FTS markers are control characters so the text can be escaped first
+    return escape(snippet).replace('\x02', HIGHLIGHT_START).replace('\x03', HIGHLIGHT_END)
+
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Index-free fallback for databases without an FTS table: ``icontains``
+    over the same fields, with a snippet cut around the first match.
+    """
+
+    def search(self, query, limit):
+        words = re.findall(r'\w+', query)
+        if not words:
+            return []
+        project_match = Q()
+        comment_match = Q()
+        for word in words:
+            project_match &= (
+                Q(project_number__icontains=word) | Q(description__icontains=word)
+                | Q(client__company_name__icontains=word)
+            )
+            comment_match &= Q(text__icontains=word)
+
+        hits = []
+        for project in Project.objects.filter(project_match).select_related('client')[:limit]:
+            text = f"{project.project_number} {project.client.company_name} {project.description}"
+            hits.append({'type': 'project', 'id': project.pk, 'project': project.pk, 'snippet': self.snippet(text, words)})
+        for comment in Comment.objects.filter(comment_match).order_by('-created_at')[:limit]:
+            hits.append({'type': 'comment', 'id': comment.pk, 'project': comment.project_id, 'snippet': self.snippet(comment.text, words)})
+        for rank, hit in enumerate(hits[:limit]):
+            hit['rank'] = rank
+        return hits[:limit]
+
+    def snippet(self, text, words, width=60):
+        pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+        match = pattern.search(text)
+        start = max(0, match.start() - width // 2) if match else 0
+        excerpt = text[start:start + width]
+        return highlight(pattern.sub(lambda m: f'\x02{m.group(0)}\x03', excerpt))
+
+
+def fts5_table_exists():
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif fts5_table_exists():
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = LikeSearchBackend()
+    return _backend
+
+
+REBUILD_PROJECTS_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, kind, object_id, project_id, number, client, body)
+    SELECT p.id * 2, 'project', p.id, p.id, p.project_number, c.company_name, p.description
+    FROM api_project p INNER JOIN api_client c ON p.client_id = c.id
+"""
+
+REBUILD_COMMENTS_SQL = f"""
+    INSERT INTO {FTS_TABLE} (rowid, kind, object_id, project_id, number, client, body)
+    SELECT id * 2 + 1, 'comment', id, project_id, '', '', text FROM api_comment
+"""
+
+
+# Incremental index maintenance
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index_projects([instance])
+
+
+@receiver(post_delete, sender=Project)
+def remove_project(sender, instance, **kwargs):
+    get_backend().remove_projects([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_backend().index_comments([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    get_backend().remove_comments([instance.pk])
+
+
+@receiver(post_save, sender=Client)
+def reindex_client_projects(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # The client name is indexed on each of its projects
+    if created or raw or (update_fields and 'company_name' not in update_fields):
+        return
+    get_backend().index_projects(list(instance.projects.only('id', 'client_id', 'project_number', 'description')))
@@ -1,9 +1,13 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.settings import api_settings
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from .models import UserProfile, Client, Project, Comment, ProjectLink, Resource
+from .bulk import MAX_BULK_ITEMS
+from .fieldsets import SparseFieldsMixin, primary_key, primary_keys
+from . import usernames
 from django.db import transaction
-import secrets
-import string
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -21,13 +25,21 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'role']
 
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    expandable_fields = {'user': primary_key}
+    expand_by_default = True
 
     class Meta:
         model = Client
         fields = ['id', 'user', 'company_name', 'contact_person', 'contact_email', 'client_type', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        if cls.expands('user', fields, expand):
+            queryset = queryset.select_related('user')
+        return queryset
     
     def create(self, validated_data):
         # Get the current user from the request context
@@ -35,34 +47,16 @@ class ClientSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             # Create a new user for this client
             with transaction.atomic():
-                # Generate username from company name
-                username = validated_data['company_name'].lower().replace(' ', '_')[:30]
-                suffix = 1
-                original_username = username
-                
-                # Ensure username is unique
-                while User.objects.filter(username=username).exists():
-                    username = f"{original_username[:27]}_{suffix}"
-                    suffix += 1
-                
-                # Generate a random password
-                alphabet = string.ascii_letters + string.digits
-                password = ''.join(secrets.choice(alphabet) for i in range(12))
+                password = usernames.random_password()
                 
-                # Create new user
-                new_user = User.objects.create_user(
-                    username=username,
+                # Create new user with a unique username derived from the company name
+                new_user = usernames.create_user(
+                    usernames.client_username(validated_data['company_name']),
+                    role='CLIENT',
                     email=validated_data.get('contact_email', ''),
                     password=password
                 )
                 
-                # Set user profile to CLIENT role
-                if not hasattr(new_user, 'profile'):
-                    UserProfile.objects.create(user=new_user, role='CLIENT')
-                else:
-                    new_user.profile.role = 'CLIENT'
-                    new_user.profile.save()
-                
                 # Create client with new user
                 validated_data['user'] = new_user
                 return super().create(validated_data)
@@ -100,34 +94,20 @@ class ResourceSerializer(serializers.ModelSerializer):
         
         with transaction.atomic():
             if not user_data:
-                # Generate a username from first_name and last_name
                 first_name = validated_data.get('first_name', '')
                 last_name = validated_data.get('last_name', '')
-                username = f"{first_name.lower()}_{last_name.lower()}"[:30]
-                
-                # Ensure username is unique
-                suffix = 1
-                original_username = username
-                while User.objects.filter(username=username).exists():
-                    username = f"{original_username[:27]}_{suffix}"
-                    suffix += 1
                 
-                # Generate a random password
-                alphabet = string.ascii_letters + string.digits
-                password = ''.join(secrets.choice(alphabet) for i in range(12))
+                password = usernames.random_password()
                 
-                # Create user
-                user = User.objects.create_user(
-                    username=username,
+                # Create user with a unique username derived from first_name and last_name
+                user = usernames.create_user(
+                    usernames.resource_username(first_name, last_name),
+                    role='RESOURCE',
                     email=validated_data.get('email', ''),
                     password=password,
-                    first_name=validated_data.get('first_name', ''),
-                    last_name=validated_data.get('last_name', '')
+                    first_name=first_name,
+                    last_name=last_name
                 )
-                
-                # Set user profile to RESOURCE role
-                user.profile.role = 'RESOURCE'
-                user.profile.save()
             else:
                 user = user_data
             
@@ -155,17 +135,38 @@ class ProjectCreateUpdateSerializer(serializers.ModelSerializer):
         ]
 
     def to_representation(self, instance):
-        # Return the detail representation after create/update
+        # Return the detail representation after create/update, reloaded with
+        # the detail prefetches so the re-render runs in a fixed number of queries
+        instance = ProjectDetailSerializer.setup_eager_loading(Project.objects.all()).get(pk=instance.pk)
         detail_serializer = ProjectDetailSerializer(instance, context=self.context)
         return detail_serializer.data
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Full project representation. Comments and links are capped at one page
+    (newest first); ``comments_next`` / ``links_next`` point at the matching
+    list endpoint to load the rest. Every relation is embedded unless
+    ``?expand=`` names a subset.
+    """
+    NESTED_PAGE_SIZE = api_settings.PAGE_SIZE
+
     client = ClientSerializer(read_only=True)
     assigned_resource = UserSerializer(read_only=True)
     resources = ResourceSerializer(many=True, read_only=True)
-    comments = CommentSerializer(many=True, read_only=True)
-    links = ProjectLinkSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
+    links = serializers.SerializerMethodField()
+    links_next = serializers.SerializerMethodField()
+    expandable_fields = {
+        'client': primary_key,
+        'assigned_resource': primary_key,
+        'resources': primary_keys,
+        'comments': None,
+        'links': None,
+    }
+    expand_by_default = True
+    dependent_fields = {'comments_next': 'comments', 'links_next': 'links'}
 
     class Meta:
         model = Project
@@ -173,23 +174,111 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
             'id', 'project_number', 'client', 'description', 
             'status', 'client_delivery_date', 'internal_due_date', 
             'assigned_resource', 'resources', 'created_at', 'updated_at',
-            'comments', 'links'
+            'comment_count', 'link_count', 'resource_count', 'last_activity_at',
+            'comments', 'comments_next', 'links', 'links_next'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', *Project.COUNTER_FIELDS]
 
+    @classmethod
+    def nested_querysets(cls):
+        return {
+            'comments': Comment.objects.select_related('user').order_by('-created_at', '-id'),
+            'links': ProjectLink.objects.select_related('added_by').order_by('-created_at', '-id'),
+        }
 
-class ProjectListSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        related = []
+        if cls.expands('client', fields, expand):
+            related.append('client__user')
+        if cls.expands('assigned_resource', fields, expand):
+            related.append('assigned_resource')
+        prefetches = []
+        if cls.shows('resources', fields):
+            expanded = cls.expands('resources', fields, expand)
+            prefetches.append(Prefetch('resources', queryset=Resource.objects.all() if expanded else Resource.objects.only('id')))
+        # One extra row per collection tells us whether there is a next page
+        limit = cls.NESTED_PAGE_SIZE + 1
+        expand = cls.resolve_expand(expand)
+        prefetches += [
+            Prefetch(name, queryset=rows[:limit], to_attr=f'page_{name}')
+            for name, rows in cls.nested_querysets().items()
+            if name in expand and (cls.shows(name, fields) or cls.shows(f'{name}_next', fields))
+        ]
+        return queryset.select_related(*related).prefetch_related(*prefetches)
+
+    def nested_page(self, obj, name):
+        rows = getattr(obj, f'page_{name}', None)
+        if rows is None:
+            related = self.nested_querysets()[name].filter(project=obj)
+            rows = list(related[:self.NESTED_PAGE_SIZE + 1])
+            setattr(obj, f'page_{name}', rows)
+        return rows
+
+    def nested_next(self, obj, name, url_name):
+        if len(self.nested_page(obj, name)) <= self.NESTED_PAGE_SIZE:
+            return None
+        url = reverse(url_name, request=self.context.get('request'))
+        return f"{url}?project={obj.pk}&page=2"
+
+    def get_comments(self, obj):
+        rows = self.nested_page(obj, 'comments')[:self.NESTED_PAGE_SIZE]
+        return CommentSerializer(rows, many=True, context=self.context).data
+
+    def get_comments_next(self, obj):
+        return self.nested_next(obj, 'comments', 'comment-list')
+
+    def get_links(self, obj):
+        rows = self.nested_page(obj, 'links')[:self.NESTED_PAGE_SIZE]
+        return ProjectLinkSerializer(rows, many=True, context=self.context).data
+
+    def get_links_next(self, obj):
+        return self.nested_next(obj, 'links', 'projectlink-list')
+
+
+class ProjectListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Compact project row. Relations are ids unless ``?expand=`` embeds them.
+    """
+    client = ClientSerializer(read_only=True)
     client_name = serializers.ReadOnlyField(source='client.company_name')
+    assigned_resource = UserSerializer(read_only=True)
     assigned_resource_name = serializers.SerializerMethodField()
+    resources = ResourceSerializer(many=True, read_only=True)
     resources_list = serializers.SerializerMethodField()
+    expandable_fields = {
+        'client': primary_key,
+        'assigned_resource': primary_key,
+        'resources': primary_keys,
+    }
 
     class Meta:
         model = Project
         fields = [
             'id', 'project_number', 'client', 'client_name', 'description', 
             'status', 'client_delivery_date', 'internal_due_date', 
-            'assigned_resource', 'assigned_resource_name', 'resources', 'resources_list', 'updated_at'
+            'assigned_resource', 'assigned_resource_name', 'resources', 'resources_list', 'updated_at',
+            'comment_count', 'link_count', 'resource_count', 'last_activity_at',
         ]
+        read_only_fields = Project.COUNTER_FIELDS
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, expand=None):
+        related = []
+        if cls.expands('client', fields, expand):
+            related.append('client__user')
+        elif cls.shows('client_name', fields):
+            related.append('client')
+        if cls.expands('assigned_resource', fields, expand) or cls.shows('assigned_resource_name', fields):
+            related.append('assigned_resource')
+        queryset = queryset.select_related(*related)
+        if cls.expands('resources', fields, expand):
+            return queryset.prefetch_related('resources')
+        if cls.shows('resources', fields) or cls.shows('resources_list', fields):
+            return queryset.prefetch_related(
+                Prefetch('resources', queryset=Resource.objects.only('id', 'first_name', 'last_name'))
+            )
+        return queryset
     
     def get_assigned_resource_name(self, obj):
         if obj.assigned_resource:
@@ -197,4 +286,41 @@ class ProjectListSerializer(serializers.ModelSerializer):
         return None
     
     def get_resources_list(self, obj):
-        return [{'id': r.id, 'name': r.full_name} for r in obj.resources.all()] 
\ No newline at end of file
+        return [{'id': r.id, 'name': r.full_name} for r in obj.resources.all()] 
+
+class ProjectBulkItemSerializer(serializers.ModelSerializer):
+    """
+    One project in a bulk create. Related ids are plain integers here; the
+    bulk endpoint resolves them for the whole batch with one query per model.
+    """
+    client = serializers.IntegerField()
+    assigned_resource = serializers.IntegerField(required=False, allow_null=True)
+    resources = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Project
+        fields = [
+            'project_number', 'client', 'description',
+            'status', 'client_delivery_date', 'internal_due_date',
+            'assigned_resource', 'resources',
+        ]
+
+
+class ProjectBulkStatusSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Project.STATUS_CHOICES)
+
+
+class ProjectBulkResourcesSerializer(serializers.Serializer):
+    ACTION_CHOICES = (
+        ('assign', 'Assign'),
+        ('unassign', 'Unassign'),
+    )
+
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    projects = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_ITEMS)
+    resources = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_ITEMS)
+
+
+class ProjectBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_ITEMS)
@@ -0,0 +1,211 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware opens a RequestTiming for each request. Every
+database connection gets ``record_query`` as an execute wrapper when it
+opens, so queries are counted and timed wherever they run, including the
+worker threads of the async views (the context variable travels with
+``sync_to_async``). The middleware turns the timings into a
+``Server-Timing`` header, logs slow requests and queries to the
+``api.performance`` logger and adds them to per-endpoint counters served,
+to local addresses only, by ``/api/metrics/``.
+"""
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .benchmarks import percentile
+
+# Latencies kept per endpoint for the percentiles
+SAMPLE_SIZE = 1000
+
+_request_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Timeline of one request. Queries may be recorded from several threads."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_queries = []
+        self.view_started = None
+        self.view_db_time = 0.0
+        self.view_finished = None
+        self.rendered = None
+
+    def add_query(self, sql, duration, slow_threshold):
+        with self.lock:
+            self.queries += 1
+            self.db_time += duration
+            if duration >= slow_threshold:
+                self.slow_queries.append((normalize_sql(sql), duration))
+
+    def start_view(self, label):
+        self.view = label
+        self.view_started = time.perf_counter()
+        self.view_db_time = self.db_time
+
+    def finish_view(self):
+        if self.view_finished is None:
+            self.view_finished = time.perf_counter()
+            self.view_db_time = self.db_time - self.view_db_time
+
+    def finish_render(self, response=None):
+        # A response rendered early still passes process_template_response
+        if self.rendered is None:
+            self.rendered = time.perf_counter()
+
+    def durations(self):
+        """Milliseconds spent in SQL, view code and serializers (excluding SQL), rendering and overall."""
+        finished = time.perf_counter()
+        self.finish_view()
+        app = render = 0.0
+        if self.view_started is not None:
+            app = max(self.view_finished - self.view_started - self.view_db_time, 0.0)
+        if self.rendered is not None:
+            render = self.rendered - self.view_finished
+        return {
+            'db': self.db_time * 1000,
+            'app': app * 1000,
+            'render': render * 1000,
+            'total': (finished - self.started) * 1000,
+        }
+
+
+def begin_request():
+    timing = RequestTiming()
+    return timing, _request_timing.set(timing)
+
+
+def end_request(token):
+    _request_timing.reset(token)
+
+
+def current_timing():
+    return _request_timing.get()
+
+
+@contextmanager
+def render_span():
+    """
+    Time rendering done outside the handler's own render step (the async
+    views render before returning), which process_template_response misses.
+    """
+    request_timing = _request_timing.get()
+    if request_timing is not None:
+        request_timing.finish_view()
+    try:
+        yield
+    finally:
+        if request_timing is not None:
+            request_timing.finish_render()
+
+
+# Query recording
+
+# Placeholder lists (IN clauses, bulk VALUES rows) vary in length; fold them
+# so the same statement always normalizes the same way
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*%s\s*,)*\s*%s\s*\)")
+_ROW_LIST = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    sql = _LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    sql = _ROW_LIST.sub(r'\1', sql)
+    return _WHITESPACE.sub(' ', sql.replace('%s', '?')).strip()
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _request_timing.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - started, settings.SLOW_QUERY_MS / 1000)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Per-endpoint counters
+
+class EndpointStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.totals = {'db': 0.0, 'app': 0.0, 'render': 0.0, 'total': 0.0}
+        self.max_ms = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, status_code, queries, durations):
+        self.requests += 1
+        self.errors += status_code >= 500
+        self.queries += queries
+        for name, value in durations.items():
+            self.totals[name] += value
+        self.max_ms = max(self.max_ms, durations['total'])
+        self.samples.append(durations['total'])
+
+    def as_dict(self):
+        samples = sorted(self.samples)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'queries_mean': round(self.queries / self.requests, 2),
+            **{f'{name}_mean_ms': round(value / self.requests, 3) for name, value in self.totals.items()},
+            'p50_ms': round(percentile(samples, 0.5), 3),
+            'p99_ms': round(percentile(samples, 0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+_endpoints = {}
+_endpoints_lock = threading.Lock()
+
+
+def record_request(endpoint, status_code, queries, durations):
+    with _endpoints_lock:
+        stats = _endpoints.get(endpoint)
+        if stats is None:
+            stats = _endpoints[endpoint] = EndpointStats()
+        stats.add(status_code, queries, durations)
+
+
+def endpoint_metrics():
+    with _endpoints_lock:
+        return {endpoint: stats.as_dict() for endpoint, stats in sorted(_endpoints.items())}
+
+
+def reset_metrics():
+    with _endpoints_lock:
+        _endpoints.clear()
+
+
+def view_label(view_func, method):
+    """``ProjectViewSet.list`` for ViewSet routes, the view's name otherwise."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+    return f"{view_class.__name__}.{action}" if action else view_class.__name__
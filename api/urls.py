@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ClientViewSet, ProjectViewSet, CommentViewSet, ProjectLinkViewSet, LoginView, ResourceViewSet
+from .async_views import AsyncSummaryRead, async_patterns, async_view
+from .views import (
+    ClientViewSet, ProjectViewSet, CommentViewSet, ProjectLinkViewSet, LoginView, ResourceViewSet,
+    DashboardSummaryView, SearchView, SyncView, activity_stream, metrics,
+)
 
 # Create a router and register our viewsets with it
 router = DefaultRouter()
@@ -10,10 +15,22 @@ router.register(r'comments', CommentViewSet)
 router.register(r'links', ProjectLinkViewSet)
 router.register(r'resources', ResourceViewSet)
 
+router_urls = router.urls
+dashboard_summary = DashboardSummaryView.as_view()
+if settings.ASYNC_API_VIEWS:
+    # Served over ASGI: GETs on the hot read endpoints run as native async views
+    router_urls = async_patterns(router_urls)
+    dashboard_summary = async_view(dashboard_summary, AsyncSummaryRead)
+
 # The API URLs are determined automatically by the router
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     # Authentication URLs
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('dashboard/summary/', dashboard_summary, name='dashboard-summary'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('events/', activity_stream, name='activity-stream'),
+    path('metrics/', metrics, name='metrics'),
     # Add other URL patterns here if needed
 ] 
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Username allocation for generated client and resource users.
+
+A base name is used as is when free, otherwise ``<base[:27]>_1``,
+``<base[:27]>_2``, ... Existing usernames sharing the prefix are fetched up
+front so collisions are resolved in memory instead of one query per try.
+"""
+import secrets
+import string
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import PROFILE_ROLE_ATTR, UserProfile
+
+# SQLite caps expression depth at 1000, so OR at most this many prefixes per query
+PREFIX_QUERY_CHUNK = 200
+
+# Attempts before giving up when concurrent inserts keep taking the picked name
+MAX_ATTEMPTS = 5
+
+
+def client_username(company_name):
+    return company_name.lower().replace(' ', '_')[:30]
+
+
+def resource_username(first_name, last_name):
+    return f"{first_name.lower()}_{last_name.lower()}"[:30]
+
+
+def prefix_of(base):
+    return base[:27]
+
+
+def candidate(base, suffix):
+    return base if suffix == 0 else f"{prefix_of(base)}_{suffix}"
+
+
+def taken_usernames(bases):
+    prefixes = sorted({prefix_of(base) for base in bases})
+    taken = set()
+    for start in range(0, len(prefixes), PREFIX_QUERY_CHUNK):
+        query = Q()
+        for prefix in prefixes[start:start + PREFIX_QUERY_CHUNK]:
+            query |= Q(username__startswith=prefix)
+        taken.update(User.objects.filter(query).values_list('username', flat=True))
+    return taken
+
+
+def allocate_usernames(bases):
+    """
+    Return a free username for each base, unique within the batch too.
+    """
+    taken = taken_usernames(bases)
+    usernames = []
+    for base in bases:
+        suffix = 0
+        while candidate(base, suffix) in taken:
+            suffix += 1
+        username = candidate(base, suffix)
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def create_user(base, role=None, password=None, **fields):
+    """
+    Like ``User.objects.create_user`` with the first free username for
+    ``base``; the profile is created by the post_save signal with ``role``.
+
+    If another request takes the name between the lookup and the insert,
+    the insert is rolled back to a savepoint and the name is picked again.
+    """
+    fields['email'] = User.objects.normalize_email(fields.get('email'))
+    for attempt in range(MAX_ATTEMPTS):
+        username = allocate_usernames([base])[0]
+        try:
+            with transaction.atomic():
+                user = User(username=username, **fields)
+                user.set_password(password)
+                setattr(user, PROFILE_ROLE_ATTR, role)
+                user.save()
+                return user
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+
+
+def random_password():
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for i in range(12))
+
+
+def bulk_create_users(rows, role, usable_passwords=True):
+    """
+    Insert users and their profiles with ``bulk_create``.
+
+    ``rows`` holds ``(base username, User field values)`` pairs; returns the
+    saved users in the same order. Without ``usable_passwords`` the users get
+    an unusable password and no hashing is done.
+    """
+    names = allocate_usernames([base for base, _ in rows])
+    users = User.objects.bulk_create([
+        User(
+            username=username,
+            password=make_password(random_password() if usable_passwords else None),
+            **fields
+        )
+        for username, (_, fields) in zip(names, rows)
+    ])
+    UserProfile.objects.bulk_create_for(users, role)
+    return users
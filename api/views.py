@@ -1,15 +1,48 @@
-print('api/views.py loaded')
+import logging
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, filters
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import viewsets, permissions, filters, serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from .models import UserProfile, Client, Project, Comment, ProjectLink, Resource
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .fieldsets import SparseFieldsViewMixin
+from .pagination import StableOrderingFilter
+from . import authentication, bulk, changelog, events, export, timing
+from .search import get_backend as get_search_backend
 from .serializers import (
     UserSerializer, UserProfileSerializer, ClientSerializer,
     ProjectListSerializer, ProjectDetailSerializer, ProjectCreateUpdateSerializer,
-    CommentSerializer, ProjectLinkSerializer, ResourceSerializer
+    CommentSerializer, ProjectLinkSerializer, ResourceSerializer,
+    ProjectBulkItemSerializer, ProjectBulkStatusSerializer, ProjectBulkResourcesSerializer,
+    ProjectBulkDeleteSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def integer_param(value, name, message, min_value=0):
+    """
+    A query parameter as an int, parsed as a serializer IntegerField would;
+    ``ValidationError({name: message})`` for anything else (str.isdigit()
+    also accepts digits such as '²' that int() rejects).
+    """
+    try:
+        return serializers.IntegerField(min_value=min_value).run_validation(value)
+    except ValidationError:
+        raise ValidationError({name: message})
+
 # Custom permission classes
 class IsAdminUser(permissions.BasePermission):
     """
@@ -46,34 +79,58 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         # return request.user.is_authenticated and hasattr(request.user, 'profile') and request.user.profile.role == 'ADMIN'
 
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(SparseFieldsViewMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint for clients.
     Admins can view and edit, clients have no access.
+    Reads take ?fields= and ?expand=user (embedded unless ?expand= leaves it out).
     """
-    queryset = Client.objects.all().order_by('company_name')
+    queryset = Client.objects.select_related('user').order_by('company_name')
     serializer_class = ClientSerializer
     permission_classes = [IsAdminUser]
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['company_name', 'contact_person', 'contact_email']
     filterset_fields = ['company_name']
+    cache_dependencies = ('client', 'user')
+
+    def get_queryset(self):
+        return ClientSerializer.setup_eager_loading(
+            Client.objects.order_by('company_name'), **self.sparse_options()
+        )
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         return context
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(SparseFieldsViewMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint for projects.
     Admins can view and edit all projects.
     Clients can only view their own projects.
+    Reads take ?fields= to pick fields and ?expand= to pick the embedded
+    relations; the rest are not loaded at all. The list sorts with
+    ?ordering= (e.g. -comment_count, -last_activity_at) and filters the
+    counters with __gte / __lte.
     """
-    queryset = Project.objects.all().order_by('-updated_at')
+    queryset = Project.objects.all().order_by('-updated_at', '-id')
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    filter_backends = [filters.SearchFilter, DjangoFilterBackend, StableOrderingFilter]
     search_fields = ['project_number', 'description']
-    filterset_fields = ['status', 'client', 'assigned_resource']
+    filterset_fields = {
+        'status': ['exact'],
+        'client': ['exact'],
+        'assigned_resource': ['exact'],
+        'comment_count': ['exact', 'gte', 'lte'],
+        'link_count': ['exact', 'gte', 'lte'],
+        'resource_count': ['exact', 'gte', 'lte'],
+        'last_activity_at': ['gte', 'lte', 'isnull'],
+    }
+    ordering_fields = ['updated_at', 'created_at', *Project.COUNTER_FIELDS]
+    cursor_ordering = ('-updated_at', '-id')
+    cache_dependencies = ('project', 'client', 'resource', 'user')
+    # The counters change with every comment and link added or removed
+    etag_fields = Project.COUNTER_FIELDS
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -89,7 +146,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         - Clients see only their own projects
         """
         # TEMPORARY: Return all projects for development
-        return Project.objects.all().order_by('-updated_at')
+        return self.with_related(Project.objects.all().order_by('-updated_at', '-id'))
         
         # Original code:
         # user = self.request.user
@@ -99,6 +156,97 @@ class ProjectViewSet(viewsets.ModelViewSet):
         #     return Project.objects.filter(client=user.client_profile).order_by('-updated_at')
         # return Project.objects.none()
 
+    def with_related(self, queryset):
+        """
+        Load the relations read by the serializer for the current action,
+        so the number of queries does not grow with the page size.
+        """
+        if self.action in ('list', 'retrieve'):
+            queryset = self.get_serializer_class().setup_eager_loading(queryset, **self.sparse_options())
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every matching project as CSV (default) or NDJSON, chosen
+        with ?output=csv|ndjson. Accepts the same filters as the list.
+        """
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in export.EXPORT_FORMATS:
+            raise ValidationError({'output': f"Choose one of: {', '.join(export.EXPORT_FORMATS)}."})
+        queryset = self.filter_queryset(Project.objects.all())
+        response = StreamingHttpResponse(
+            export.export_lines(export_format, queryset),
+            content_type=export.CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="projects.{export_format}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create many projects from a list. Valid items are created even if
+        others fail; the response lists an id or errors per item.
+        """
+        bulk.check_batch(request.data)
+        results = []
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = ProjectBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results.append({'index': index, 'errors': serializer.errors})
+        if valid:
+            results += bulk.create_projects(valid)
+        results.sort(key=lambda result: result['index'])
+
+        created = sum(1 for result in results if 'id' in result)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(
+            {'created': created, 'failed': len(results) - created, 'results': results},
+            status=response_status,
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Change the status of many projects: a list of {"id", "status"}.
+        """
+        bulk.check_batch(request.data)
+        serializer = ProjectBulkStatusSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        results = bulk.update_statuses(serializer.validated_data)
+        updated = sum(1 for result in results if 'id' in result)
+        return Response({'updated': updated, 'failed': len(results) - updated, 'results': results})
+
+    @action(detail=False, methods=['post'], url_path='bulk-resources')
+    def bulk_resources(self, request):
+        """
+        Assign or unassign resources across many projects.
+        """
+        serializer = ProjectBulkResourcesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        changed = bulk.change_resources(data['action'], data['projects'], data['resources'])
+        return Response({'changed': changed})
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Delete many projects by id: {"ids": [...]}.
+        """
+        serializer = ProjectBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        deleted = self.get_queryset().filter(pk__in=ids).delete()[1].get(Project._meta.label, 0)
+        return Response({'deleted': deleted})
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     """
@@ -106,11 +254,12 @@ class CommentViewSet(viewsets.ModelViewSet):
     Admins can view and edit all comments.
     Clients can only view comments on their own projects.
     """
-    queryset = Comment.objects.all().order_by('-created_at')
+    queryset = Comment.objects.all().order_by('-created_at', '-id')
     serializer_class = CommentSerializer
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['project']
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         """
@@ -119,7 +268,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         - Clients see only comments on their own projects
         """
         # TEMPORARY: Return all comments for development
-        return Comment.objects.all().order_by('-created_at')
+        return Comment.objects.select_related('user').order_by('-created_at', '-id')
         
         # Original code:
         # user = self.request.user
@@ -139,11 +288,12 @@ class ProjectLinkViewSet(viewsets.ModelViewSet):
     Admins can view and edit all links.
     Clients can only view links on their own projects.
     """
-    queryset = ProjectLink.objects.all().order_by('-created_at')
+    queryset = ProjectLink.objects.all().order_by('-created_at', '-id')
     serializer_class = ProjectLinkSerializer
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['project']
+    cursor_ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         """
@@ -152,7 +302,7 @@ class ProjectLinkViewSet(viewsets.ModelViewSet):
         - Clients see only links on their own projects
         """
         # TEMPORARY: Return all links for development
-        return ProjectLink.objects.all().order_by('-created_at')
+        return ProjectLink.objects.select_related('added_by').order_by('-created_at', '-id')
         
         # Original code:
         # user = self.request.user
@@ -166,7 +316,7 @@ class ProjectLinkViewSet(viewsets.ModelViewSet):
         serializer.save(added_by=self.request.user)
 
 
-class ResourceViewSet(viewsets.ModelViewSet):
+class ResourceViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint for resources.
     Admins can view and edit, clients have no access.
@@ -177,15 +327,198 @@ class ResourceViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['first_name', 'last_name', 'email', 'title']
     filterset_fields = ['is_active']
+    cache_dependencies = ('resource',)
+
+
+class DashboardSummaryView(APIView):
+    """
+    API endpoint for the dashboard summary: project counts by status and
+    client type, overdue projects and per-resource load.
+    Each figure is a single grouped aggregate query. Accepts ?client=<id>.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        projects = self.get_projects(request)
+        return Response({name: query() for name, query in self.summary_queries(projects).items()})
+
+    def summary_queries(self, projects):
+        # Independent of each other, so the async view runs them concurrently
+        return {
+            'by_status': lambda: self.count_by_status(projects),
+            'by_client_type': lambda: self.count_by_client_type(projects),
+            'overdue': lambda: self.count_overdue(projects),
+            'resource_load': lambda: self.resource_load(projects),
+        }
+
+    def get_projects(self, request):
+        client = request.query_params.get('client')
+        if client is None:
+            return Project.objects.all()
+        client = integer_param(client, 'client', 'A valid integer is required.')
+        return Project.objects.filter(client_id=client)
+
+    def count_by_status(self, projects):
+        counts = dict.fromkeys((key for key, _ in Project.STATUS_CHOICES), 0)
+        rows = projects.order_by().values_list('status').annotate(count=Count('id'))
+        counts.update(rows)
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def count_by_client_type(self, projects):
+        counts = dict.fromkeys((key for key, _ in Client.CLIENT_TYPE_CHOICES), 0)
+        counts.update(projects.order_by().values_list('client__client_type').annotate(count=Count('id')))
+        return counts
+
+    def count_overdue(self, projects):
+        today = timezone.localdate()
+        internal = Q(internal_due_date__lt=today)
+        delivery = Q(client_delivery_date__lt=today)
+        return projects.exclude(status='COMPLETE').aggregate(
+            past_internal_due_date=Count('id', filter=internal),
+            past_client_delivery_date=Count('id', filter=delivery),
+            total=Count('id', filter=internal | delivery),
+        )
+
+    def resource_load(self, projects):
+        in_scope = Q(projects__in=projects)
+        resources = Resource.objects.filter(is_active=True).annotate(
+            active_projects=Count('projects', filter=in_scope & Q(projects__status='ACTIVE')),
+            open_projects=Count('projects', filter=in_scope & ~Q(projects__status='COMPLETE')),
+        ).order_by('first_name', 'last_name')
+        return [
+            {
+                'id': row['id'],
+                'name': f"{row['first_name']} {row['last_name']}",
+                'active_projects': row['active_projects'],
+                'open_projects': row['open_projects'],
+            }
+            for row in resources.values('id', 'first_name', 'last_name', 'active_projects', 'open_projects')
+        ]
+
+
+class SearchView(APIView):
+    """
+    API endpoint for full-text search over projects and comments.
+    Takes ?q=<words> and an optional ?limit= (default 20, at most 100).
+    Results are ranked best first with a highlighted snippet.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This parameter is required.'})
+        limit = integer_param(
+            request.query_params.get('limit', self.default_limit), 'limit', 'A positive integer is required.',
+            min_value=1,
+        )
+        return Response({'results': get_search_backend().search(query, min(limit, self.max_limit))})
+
+
+class SyncView(APIView):
+    """
+    API endpoint for incremental sync. ``?since=<token>`` returns the
+    projects, comments, links, resources and clients created or changed
+    since the token, the ids of those deleted, and the token to send next;
+    ``more`` is true while further changes remain. Without ``since`` only the
+    current token is returned: take it before the initial full load. An
+    expired token gets 410 Gone and the client reloads everything.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+    # Change log kind: (response key, serializer, queryset loading what it reads)
+    sources = {
+        'project': ('projects', ProjectListSerializer, ProjectListSerializer.setup_eager_loading(Project.objects.all())),
+        'comment': ('comments', CommentSerializer, Comment.objects.select_related('user')),
+        'link': ('links', ProjectLinkSerializer, ProjectLink.objects.select_related('added_by')),
+        'resource': ('resources', ResourceSerializer, Resource.objects.all()),
+        'client': ('clients', ClientSerializer, Client.objects.select_related('user')),
+    }
+
+    def get(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'token': str(changelog.current_token())})
+        since = integer_param(since, 'since', 'A valid sync token is required.')
+        if changelog.expired(since):
+            return Response(
+                {'detail': 'The sync token has expired; reload and sync from a new token.'},
+                status=status.HTTP_410_GONE,
+            )
+
+        changed, deleted, token, more = changelog.changes_since(since, settings.SYNC_MAX_CHANGES)
+        payload = {'token': str(token), 'more': more, 'changed': {}, 'deleted': {}}
+        for kind, (key, serializer_class, queryset) in self.sources.items():
+            # An object missing here was deleted by a later entry, served next time
+            rows = queryset.filter(pk__in=changed[kind]).order_by('pk') if changed[kind] else []
+            payload['changed'][key] = serializer_class(rows, many=True, context={'request': request}).data
+            payload['deleted'][key] = sorted(deleted[kind])
+        return Response(payload)
+
+async def activity_stream(request):
+    """
+    Server-Sent Events stream of project activity: status changes, resource
+    reassignments, new comments and links. ``?client=<id>`` limits it to one
+    client's projects (client users only ever get their own); reconnects
+    resume after ``Last-Event-ID``. Only served over ASGI: a WSGI server
+    would hold a worker thread per open stream and, as it iterates the
+    async stream to completion before sending, never flush a frame.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'The activity stream is only available when the API is served over ASGI.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    client = request.GET.get('client')
+    try:
+        scope = None if client is None else integer_param(client, 'client', 'A valid integer is required.')
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    # The API's own authenticators (tokens), not just the session middleware
+    try:
+        user = await sync_to_async(authentication.authenticate)(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': exc.detail}, status=exc.status_code, headers={'WWW-Authenticate': 'Token'})
+    if user.is_authenticated:
+        own_client = await Client.objects.filter(user_id=user.pk).values_list('pk', flat=True).afirst()
+        if own_client is not None:
+            scope = own_client
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = integer_param(last_event_id, 'last_event_id', '') if last_event_id else None
+    except ValidationError:
+        # Not an id this server sent: stream from now on
+        last_event_id = None
+    subscription, missed, complete = events.get_broker().subscribe(scope, last_event_id)
+    response = StreamingHttpResponse(
+        events.event_stream(subscription, missed, complete, settings.EVENTS_HEARTBEAT),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def metrics(request):
+    """
+    Per-endpoint request counts, errors, query counts and latencies for this
+    process since it started. Only answers METRICS_ALLOWED_IPS (loopback by
+    default), e.g. a local scraper or an operator on the host.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return JsonResponse({'endpoints': timing.endpoint_metrics()})
 
 # Authentication views
 from django.contrib.auth import authenticate
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
-from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny
+from .authentication import get_token
 
 class LoginView(APIView):
     """
@@ -194,40 +527,35 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request, *args, **kwargs):
-        print(f"Content-Type: {request.content_type}")
-        print(f"Request data: {request.data}")
         username = request.data.get('username')
         password = request.data.get('password')
-        print(f"Login attempt: username={username}, password={'*' * len(password) if password else None}")
-        user = authenticate(username=username, password=password)
-        print(f"Authentication result: user={user}")
-        if user:
-            try:
-                profile = user.profile
-                print(f"User profile: role={profile.role}")
-                # Create or get token
-                token, created = Token.objects.get_or_create(user=user)
-                return Response({
-                    'token': token.key,
-                    'user': {
-                        'id': user.id,
-                        'username': user.username,
-                        'email': user.email,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name
-                    },
-                    'profile': {
-                        'id': profile.id,
-                        'role': profile.role
-                    }
-                })
-            except UserProfile.DoesNotExist:
-                print("UserProfile does not exist for this user")
-                return Response(
-                    {'error': 'User profile not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        return Response(
-            {'error': 'Invalid credentials'},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+        user = authenticate(request, username=username, password=password)
+        if user is None:
+            logger.warning('login failed', extra={'username': username})
+            return Response(
+                {'error': 'Invalid credentials'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            logger.error('login without profile', extra={'user_id': user.pk})
+            return Response(
+                {'error': 'User profile not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        logger.info('login succeeded', extra={'user_id': user.pk, 'role': profile.role})
+        return Response({
+            'token': get_token(user),
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name
+            },
+            'profile': {
+                'id': profile.id,
+                'role': profile.role
+            }
+        })
@@ -0,0 +1,32 @@
+"""
+``logfmt``-style log lines: ``level=... logger=... msg="..."`` followed by
+the fields passed in ``extra``, so log pipelines can index them without
+parsing free text.
+"""
+import logging
+
+# Attributes every LogRecord has; anything else came from ``extra``
+RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def quote(value):
+    value = str(value)
+    if not value or any(char in value for char in ' ="\\'):
+        value = '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return value
+
+
+class KeyValueFormatter(logging.Formatter):
+
+    def format(self, record):
+        fields = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S%z'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields.update((name, value) for name, value in vars(record).items() if name not in RECORD_ATTRS)
+        line = ' '.join(f"{name}={quote(value)}" for name, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
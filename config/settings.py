@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .database import parse_database_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -40,12 +42,15 @@ INSTALLED_APPS = [
 
 # Add MIDDLEWARE section
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -73,13 +78,95 @@ TEMPLATES = [
 # Add WSGI_APPLICATION section
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Native async views for the read endpoints (api/async_views.py), off by
+# default: they only apply under ASGI and have not measurably beaten the sync
+# views yet. ASYNC_PARALLEL_QUERIES runs the dashboard summary's independent
+# queries on separate connections at once.
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', 'False') == 'True'
+ASYNC_PARALLEL_QUERIES = os.getenv('ASYNC_PARALLEL_QUERIES', 'True') == 'True'
+
+# Database: DATABASE_URL (postgres://... or sqlite:///...), tuned by the
+# DB_* variables documented in config/database.py
 DATABASES = {
+    'default': parse_database_url(os.getenv('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}")),
+}
+
+# Read replicas: comma-separated DATABASE_REPLICA_URLS. Safe-method API
+# requests read from them; writes and anything within REPLICA_PIN_SECONDS
+# of the same client's or user's last write use the primary.
+REPLICA_DATABASES = []
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**parse_database_url(url.strip()), 'TEST': {'MIRROR': 'default'}}
+    REPLICA_DATABASES.append(alias)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+
+# Cache: locmem by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache) in production
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# Seconds a cached API response is kept (entries are also invalidated on write)
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '300'))
+
+
+# Activity stream (/api/events/): broker class, events kept for resuming
+# after Last-Event-ID, per-stream queue limit before a slow client is
+# dropped, and seconds between keepalive comments
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'api.events.InProcessBroker')
+EVENTS_BUFFER_SIZE = int(os.getenv('EVENTS_BUFFER_SIZE', '1000'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+EVENTS_HEARTBEAT = int(os.getenv('EVENTS_HEARTBEAT', '15'))
+EVENTS_RETRY_MS = 3000
+
+# Seconds an API token lookup is cached (revocation also drops it)
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', '300'))
+
+# Logging: logfmt lines on stderr; LOG_LEVEL gates the api loggers (INFO
+# adds one line per successful login)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'logfmt': {'()': 'config.logfmt.KeyValueFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'logfmt'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': os.getenv('LOG_LEVEL', 'WARNING'), 'propagate': False},
+    },
+}
+
+# Performance instrumentation: Server-Timing header on every response,
+# warnings on api.performance for requests/queries slower than these many
+# milliseconds, and the addresses allowed to read /api/metrics/
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '100'))
+METRICS_ALLOWED_IPS = os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Incremental sync (/api/sync/): change log entries per response, seconds an
+# entry waits before it is served (longer than any write transaction), and
+# days prune_change_log keeps entries for
+SYNC_MAX_CHANGES = int(os.getenv('SYNC_MAX_CHANGES', '1000'))
+SYNC_SETTLE_SECONDS = float(os.getenv('SYNC_SETTLE_SECONDS', '2'))
+SYNC_RETENTION_DAYS = int(os.getenv('SYNC_RETENTION_DAYS', '30'))
+
+# API payloads: orjson renders and parses JSON when installed (FAST_JSON
+# turns it off); responses of at least COMPRESSION_MIN_BYTES are brotli
+# (when installed) or gzip compressed for clients that accept it
+FAST_JSON = os.getenv('FAST_JSON', 'True') == 'True'
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/stable/ref/settings/#auth-password-validators
@@ -122,8 +209,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST_FRAMEWORK Settings (Add this section at the end)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        # Token lookups are cached; see api/authentication.py
+        'api.authentication.CachedTokenAuthentication',
         # TEMPORARY: Commented out for development - uncomment for production
-        # 'rest_framework.authentication.TokenAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -132,9 +220,20 @@ REST_FRAMEWORK = {
         # Original setting:
         # 'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Page numbers by default; ?pagination=cursor, ?page_size= and ?count=false per request
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.DashboardPagination',
     'PAGE_SIZE': 10, # Optional: Add default pagination
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # orjson when installed, DRF's stdlib encoder otherwise; see api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 # Add CORS settings